@@ -8,9 +8,12 @@ from dotenv import load_dotenv
 # Add ../lib to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
-from lib.base_utils import get_platform_paths, clean_html_content, load_db, save_all
-from lib.oauth_session import setup_oauth_session
+from lib import instrumentation
+from lib.base_utils import get_platform_paths, load_db, save_all
 from lib.message_model import BaseMessage
+from lib.checkpoint import Checkpoint
+# requests / requests_oauthlib / bs4 based modules are imported where they are used,
+# so `--help` and the multi-exporter runner don't pay for them up front
 
 # --- 1. CONFIG & PATHS ---
 load_dotenv()
@@ -19,82 +22,204 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 BASE_DATA_DIR = os.path.join(SCRIPT_DIR, os.getenv('DATA_DIR', './../data'))
 PATHS = get_platform_paths("aweber", BASE_DATA_DIR)
 TOKEN_FILE = os.path.join(SCRIPT_DIR, 'aweber_token.json')
+HTTP_CACHE_FILE = os.path.join(PATHS['base'], 'aweber_http_cache.sqlite')
+API_BASE = os.getenv('API_BASE', 'https://api.aweber.com/1.0')
+
+def is_sent_broadcast(url, resp):
+    """Sent broadcasts never change, so their detail responses can be served from cache forever."""
+    if '/broadcasts/' not in url: return False
+    try:
+        return resp.json().get('status') == 'sent'
+    except ValueError:
+        return False
+
+def sync_broadcasts(aweber, messages, full, start_filter, concurrency=4, checkpoint=None, resume=None):
+    """
+    Fetches broadcasts of the first list into `messages` (updated in place).
+    Progress (finished statuses, the next_collection_link cursor of the current one and every message
+    fetched so far) is saved to `checkpoint` after a page once its interval passed, after each status and on
+    errors; `resume` is such a saved state to continue.
+    Returns the list name and whether every collection was listed to its end.
+    """
+    from lib.api_fetcher import ApiFetcher, iter_collection
+    from lib.html_clean import clean_html_batch, cleaning_pool
+
+    progress = {"done": [], "cursors": {}}
+    fetched = set()
+    if resume:
+        progress = {"done": resume.get('done', []), "cursors": resume.get('cursors', {})}
+        for mid, data in resume.get('messages', {}).items():
+            messages[mid] = BaseMessage.from_dict(data)
+            fetched.add(mid)
+        print(f"↪️  Resuming: {len(fetched)} message(s) restored, done: {', '.join(progress['done']) or 'nothing yet'}.")
+
+    def state():
+        return {"full": full, "start_filter": start_filter, **progress,
+                "messages": {mid: messages[mid].to_dict() for mid in fetched}}
 
-def main():
-    parser = argparse.ArgumentParser(description="AWeber Exporter v2.8 (Ultra-Clean)")
-    parser.add_argument('--full', action='store_true')
-    parser.add_argument('--from-date', help="YYYY-MM-DD")
-    args = parser.parse_args()
-
-    # --- 2. DB SETUP ---
-    if args.full and os.path.exists(PATHS['db']):
-        os.rename(PATHS['db'], f"{PATHS['db']}.bak")
-    
-    # Load existing data from local DB file (if exists)
-    last_sync, list_name, messages = load_db(PATHS['db'], BaseMessage)
-    start_filter = args.from_date if args.from_date else last_sync
-
-    # --- 3. OAUTH SESSION ---
-    aweber = setup_oauth_session(
-        client_id=os.getenv('AWEBER_CLIENT_ID'),
-        client_secret=os.getenv('AWEBER_CLIENT_SECRET'),
-        token_file=TOKEN_FILE,
-        auth_url="https://auth.aweber.com/oauth2/authorize",
-        token_url="https://auth.aweber.com/oauth2/token",
-        redirect_uri=os.getenv('AWEBER_REDIRECT_URI', 'https://localhost'),
-        scopes=['account.read', 'list.read', 'email.read']
-    )
-
-    # --- 4. API LOGIC ---
     print(f"🔍 Syncing AWeber...")
-    acc_data = aweber.get("https://api.aweber.com/1.0/accounts").json()
+    acc_data = aweber.get(f"{API_BASE}/accounts").json()
     account = acc_data['entries'][0]
     list_data = aweber.get(account['lists_collection_link']).json()
     target_list = list_data['entries'][0]
-    list_name = target_list['name']
-
-    # Clean drafts/scheduled, keep only certain 'sent'
-    if not args.full:
-        messages = {mid: m for mid, m in messages.items() if m.status == 'sent'}
-
-    for status in ['draft', 'scheduled', 'sent']:
-        print(f"📥 Checking {status}...")
-        bc_url = target_list.get(f"{status}_broadcasts_link") or f"https://api.aweber.com/1.0/accounts/{account['id']}/lists/{target_list['id']}/broadcasts"
-        
-        url = bc_url
-        params = {'status': status} if 'broadcasts' in url and status != 'draft' else {}
-        
-        while url:
-            resp = aweber.get(url, params=params if url == bc_url else None)
-            if resp.status_code != 200: break
-            
-            page = resp.json()
-            for entry in page.get('entries', []):
-                mid = str(entry.get('id') or entry.get('broadcast_id') or entry.get('draft_id'))
-                mdate = entry.get('sent_at') or entry.get('scheduled_for') or entry.get('created_at') or "1970-01-01"
-                
-                if not args.full:
-                    if status == 'sent' and mdate < start_filter: continue
-                    if mid in messages and messages[mid].status == 'sent': continue
-
-                print(f"   + Processing: {entry.get('subject', 'No Subject')[:40]}...")
-                d_resp = aweber.get(entry['self_link'])
-                if d_resp.status_code != 200: continue
-                
-                d = d_resp.json()
-                cleaned = clean_html_content(d.get('body_html'))
-                
-                messages[mid] = BaseMessage(
-                    id=mid, date=mdate, status=d.get('status') or status,
-                    content=cleaned['body'], subject=d.get('subject'),
-                    preview=cleaned['preview'], source='aweber', subchannel='newsletter'
-                )
-            url = page.get('next_collection_link')
-
-    # --- 5. SAVE ---
-    last_sync = datetime.now().isoformat()
-    save_all(messages, PATHS, last_sync, list_name, title="AWeber Archive")
-    print("✅ Done!")
+
+    # One cleaning pool for the whole sync instead of a new one per page
+    with ApiFetcher(aweber, concurrency=concurrency) as fetcher, cleaning_pool() as html_pool:
+        try:
+            for status in ['draft', 'scheduled', 'sent']:
+                if status in progress['done']:
+                    print(f"⏭️  {status}: already fetched before the interruption.")
+                    continue
+                print(f"📥 Checking {status}...")
+                bc_url = target_list.get(f"{status}_broadcasts_link") or f"{API_BASE}/accounts/{account['id']}/lists/{target_list['id']}/broadcasts"
+                params = {'status': status} if 'broadcasts' in bc_url and status != 'draft' else {}
+                if progress['cursors'].get(status):
+                    bc_url, params = progress['cursors'][status], None
+
+                complete = False
+                pages = iter_collection(fetcher, bc_url, params)
+                while True:
+                    # Details are fetched in parallel while the next page is being prefetched
+                    with instrumentation.span("sync.api"):
+                        page = next(pages, None)
+                        if page is None: break
+                        pending = []
+                        for entry in page.get('entries', []):
+                            mid = str(entry.get('id') or entry.get('broadcast_id') or entry.get('draft_id'))
+                            mdate = entry.get('sent_at') or entry.get('scheduled_for') or entry.get('created_at') or "1970-01-01"
+
+                            if not full:
+                                if status == 'sent' and mdate < start_filter: continue
+                                if mid in messages and messages[mid].status == 'sent': continue
+
+                            print(f"   + Processing: {entry.get('subject', 'No Subject')[:40]}...")
+                            pending.append((mid, mdate, fetcher.submit(entry['self_link'])))
+
+                        details = []
+                        for mid, mdate, future in pending:
+                            d_resp = future.result()
+                            if d_resp is None or d_resp.status_code != 200: continue
+                            details.append((mid, mdate, d_resp.json()))
+
+                    # HTML cleaning is the CPU hot spot on full rebuilds, so each page is cleaned as one batch
+                    with instrumentation.span("sync.clean_html"):
+                        cleaned_bodies = clean_html_batch([d.get('body_html') for _, _, d in details], pool=html_pool)
+                    for (mid, mdate, d), cleaned in zip(details, cleaned_bodies):
+                        messages[mid] = BaseMessage(
+                            id=mid, date=mdate, status=d.get('status') or status,
+                            content=cleaned['body'], subject=d.get('subject'),
+                            preview=cleaned['preview'], source='aweber', subchannel='newsletter'
+                        )
+                        fetched.add(mid)
+
+                    next_url = page.get('next_collection_link')
+                    complete = not next_url
+                    if next_url: progress['cursors'][status] = next_url
+                    # state() converts every message fetched so far, so only build it when a write is due
+                    if checkpoint and checkpoint.due(): checkpoint.save(state())
+
+                if complete:
+                    progress['done'].append(status)
+                    progress['cursors'].pop(status, None)
+                else:
+                    print(f"⚠️ {status}: listing stopped early because a request failed.")
+                if checkpoint: checkpoint.save(state(), force=True)
+        except BaseException:
+            if checkpoint:
+                checkpoint.save(state(), force=True)
+                print(f"💾 Progress saved ({len(fetched)} message(s)). Run again with --resume to continue.")
+            raise
+
+        print(fetcher.stats_line())
+    return target_list['name'], all(s in progress['done'] for s in ['draft', 'scheduled', 'sent'])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AWeber Exporter v2.8 (Ultra-Clean)")
+    parser.add_argument('--full', action='store_true')
+    parser.add_argument('--resume', action='store_true', help="Continue an interrupted sync from its last checkpoint")
+    parser.add_argument('--skip-unchanged', action='store_true', help="Don't rewrite the Markdown export if its content is unchanged")
+    parser.add_argument('--from-date', help="YYYY-MM-DD")
+    parser.add_argument('--shard-tokens', type=int, help="Split the export into shards of ~N tokens")
+    parser.add_argument('--shard-bytes', type=int, help="Split the export into shards of at most N bytes")
+    parser.add_argument('--dedup', action='store_true', help="Collapse near-duplicates of earlier messages (any platform) in the export")
+    parser.add_argument('--concurrency', type=int, default=4, help="Parallel API requests")
+    parser.add_argument('--no-cache', action='store_true', help="Bypass the on-disk HTTP cache")
+    parser.add_argument('--cache-ttl', type=int, default=0, help="Seconds a cached page counts as fresh without revalidation")
+    parser.add_argument('--report', action='store_true', help="Record per-stage timings/counters into a JSON run report")
+    parser.add_argument('--profile', action='store_true', help="Also dump cProfile stats (implies --report)")
+    args = parser.parse_args(argv)
+
+    if args.report or args.profile:
+        instrumentation.enable(profile=args.profile)
+    else:
+        instrumentation.disable()
+
+    # --- 2. CHECKPOINT & DB SETUP ---
+    checkpoint = Checkpoint(PATHS['checkpoint'])
+    resume = checkpoint.load()
+    if resume and not args.resume:
+        print(f"ℹ️ Found an interrupted sync (saved {resume.get('saved')}, {len(resume.get('messages', {}))} messages). "
+              f"Starting over; use --resume to continue it instead.")
+        resume = None
+    elif args.resume and not resume:
+        print("ℹ️ No checkpoint to resume from, running a normal sync.")
+    full = resume['full'] if resume else args.full
+
+    # The run report is written even when the sync is incomplete or fails
+    messages = {}
+    try:
+        # Load existing data from local DB file (if exists).
+        # A --full rebuild starts empty but leaves the DB untouched until the new data is saved.
+        with instrumentation.span("load_db"):
+            last_sync, list_name, messages = load_db(PATHS['db'], BaseMessage, lazy=True)
+        if full: messages = {}
+        start_filter = resume['start_filter'] if resume else (args.from_date or last_sync)
+
+        # --- 3. OAUTH SESSION ---
+        from lib.oauth_session import setup_oauth_session
+        from lib.http_cache import CachedSession
+
+        aweber = setup_oauth_session(
+            client_id=os.getenv('AWEBER_CLIENT_ID'),
+            client_secret=os.getenv('AWEBER_CLIENT_SECRET'),
+            token_file=TOKEN_FILE,
+            auth_url="https://auth.aweber.com/oauth2/authorize",
+            token_url="https://auth.aweber.com/oauth2/token",
+            redirect_uri=os.getenv('AWEBER_REDIRECT_URI', 'https://localhost'),
+            scopes=['account.read', 'list.read', 'email.read']
+        )
+        if not args.no_cache:
+            aweber = CachedSession(aweber, HTTP_CACHE_FILE, default_ttl=args.cache_ttl, immutable=is_sent_broadcast)
+
+        # --- 4. API LOGIC ---
+        # Clean drafts/scheduled, keep only certain 'sent'
+        if not full:
+            messages = {mid: m for mid, m in messages.items() if m.status == 'sent'}
+
+        with instrumentation.span("sync"):
+            list_name, complete = sync_broadcasts(aweber, messages, full, start_filter, args.concurrency,
+                                                  checkpoint=checkpoint, resume=resume)
+        if not args.no_cache:
+            print(aweber.stats_line())
+            aweber.close()
+
+        if not complete:
+            # Saving now would drop whatever the failed listing didn't reach
+            print("⚠️ Sync incomplete, nothing saved. Run again with --resume to fetch the rest.")
+            return {"messages": len(messages), "changed": 0, "incomplete": True}
+
+        # --- 5. SAVE ---
+        last_sync = datetime.now().isoformat()
+        changed = save_all(messages, PATHS, last_sync, list_name, title="AWeber Archive",
+                           skip_unchanged_export=args.skip_unchanged,
+                           shard_tokens=args.shard_tokens, shard_bytes=args.shard_bytes,
+                           dedup=args.dedup, backup=full)
+        checkpoint.clear()
+        print("✅ Done!")
+        return {"messages": len(messages), "changed": changed}
+    finally:
+        instrumentation.finish(PATHS['run_report'], PATHS['profile'] if args.profile else None,
+                               messages=len(messages))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
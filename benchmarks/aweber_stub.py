@@ -0,0 +1,125 @@
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from synthetic import aweber_broadcasts, tiny_png
+
+# --- LOCAL AWEBER STAND-IN ---
+# Mimics the parts of the AWeber API the dumper uses:
+#   /1.0/accounts -> lists_collection_link -> broadcasts?status=... (paged with next_collection_link)
+#   -> self_link details with body_html. Also serves /images/<n>.png for Buffer media downloads.
+# Latency and HTTP 429 (with Retry-After) are configurable.
+
+class AWeberStub:
+    def __init__(self, broadcasts, page_size=100, latency=0.0, throttle_rate=0.0, retry_after=1, seed=3):
+        self.broadcasts = {b['id']: b for b in broadcasts}
+        self.page_size = page_size
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.requests = 0
+        self.throttled = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._png = tiny_png()
+        self._server = None
+
+    @property
+    def api_base(self):
+        return f"{self.base_url}/1.0"
+
+    def start(self, port=0):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args): pass
+
+            def do_GET(self):
+                stub._handle(self)
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self._server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def _handle(self, req):
+        with self._lock:
+            self.requests += 1
+            throttle = self._rng.random() < self.throttle_rate
+            if throttle: self.throttled += 1
+        if self.latency: time.sleep(self.latency)
+        if throttle:
+            req.send_response(429)
+            req.send_header('Retry-After', str(self.retry_after))
+            req.end_headers()
+            return
+
+        url = urlparse(req.path)
+        parts = url.path.strip('/').split('/')
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        if parts[0] == 'images':
+            return self._send(req, 200, self._png, 'image/png')
+        if parts == ['1.0', 'accounts']:
+            return self._json(req, {"entries": [{"id": 1, "lists_collection_link": f"{self.api_base}/accounts/1/lists"}]})
+        if parts == ['1.0', 'accounts', '1', 'lists']:
+            return self._json(req, {"entries": [{"id": 1, "name": "Benchmark List"}]})
+        if parts[:5] == ['1.0', 'accounts', '1', 'lists', '1'] and parts[5:6] == ['broadcasts']:
+            if len(parts) == 7:
+                detail = self.broadcasts.get(int(parts[6]))
+                return self._json(req, detail) if detail else self._send(req, 404, b"", 'text/plain')
+            return self._collection(req, query)
+        self._send(req, 404, b"", 'text/plain')
+
+    def _collection(self, req, query):
+        status = query.get('status', 'draft')
+        start = int(query.get('ws.start', 0))
+        matching = [b for b in self.broadcasts.values() if b['status'] == status]
+        page = matching[start:start + self.page_size]
+        link = f"{self.api_base}/accounts/1/lists/1/broadcasts"
+        body = {"entries": [{
+            "id": b['id'], "subject": b['subject'], "sent_at": b['sent_at'], "created_at": b['created_at'],
+            "self_link": f"{link}/{b['id']}",
+        } for b in page], "total_size": len(matching)}
+        if start + self.page_size < len(matching):
+            body["next_collection_link"] = f"{link}?status={status}&ws.start={start + self.page_size}"
+        self._json(req, body)
+
+    def _json(self, req, data):
+        self._send(req, 200, json.dumps(data).encode('utf-8'), 'application/json')
+
+    def _send(self, req, code, body, content_type):
+        req.send_response(code)
+        req.send_header('Content-Type', content_type)
+        req.send_header('Content-Length', str(len(body)))
+        req.end_headers()
+        req.wfile.write(body)
+
+def main():
+    parser = argparse.ArgumentParser(description="Local AWeber API stand-in for benchmarks")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--broadcasts', type=int, default=1000)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.05, help="Seconds added to every response")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="Fraction of requests answered with 429")
+    args = parser.parse_args()
+
+    stub = AWeberStub(aweber_broadcasts(args.broadcasts), args.page_size, args.latency, args.throttle_rate).start(args.port)
+    print(f"🧪 AWeber stub on {stub.api_base} (set API_BASE to this to point aweber_dumper at it). Ctrl+C to stop.")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        stub.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import os
+import sys
+import glob
+import time
+import random
+import argparse
+
+# Add repo root to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from lib.html_clean import ENGINES, clean_html_batch
+from synthetic import fake_newsletter
+
+def load_corpus(args):
+    if args.corpus:
+        files = sorted(glob.glob(os.path.join(args.corpus, "*.html")))
+        return [open(f, encoding='utf-8').read() for f in files]
+    rng = random.Random(42)
+    return [fake_newsletter(rng) for _ in range(args.size)]
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare HTML cleaning engines (bs4 vs fast)")
+    parser.add_argument('--size', type=int, default=300, help="Number of synthetic newsletters")
+    parser.add_argument('--corpus', help="Directory with real *.html newsletter bodies instead of synthetic ones")
+    parser.add_argument('--workers', type=int, default=None, help="Process pool size for the batch run")
+    parser.add_argument('--chunksize', type=int, default=16)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args)
+    mb = sum(len(h.encode('utf-8')) for h in corpus) / 1e6
+    print(f"📚 Corpus: {len(corpus)} documents, {mb:.1f} MB")
+
+    reference, t_ref = timed(lambda: [ENGINES['bs4'](h) for h in corpus])
+    fast, t_fast = timed(lambda: [ENGINES['fast'](h) for h in corpus])
+    batch, t_batch = timed(lambda: clean_html_batch(corpus, workers=args.workers, chunksize=args.chunksize))
+
+    mismatches = sum(1 for a, b in zip(reference, fast) if a != b) + sum(1 for a, b in zip(reference, batch) if a != b)
+    print(f"   bs4 (html.parser) : {t_ref:7.2f}s  {len(corpus) / t_ref:8.1f} docs/s")
+    print(f"   fast              : {t_fast:7.2f}s  {len(corpus) / t_fast:8.1f} docs/s  ({t_ref / t_fast:.1f}x)")
+    print(f"   fast, batch/pool  : {t_batch:7.2f}s  {len(corpus) / t_batch:8.1f} docs/s  ({t_ref / t_batch:.1f}x)")
+    print(f"{'✅' if not mismatches else '❌'} Output mismatches vs bs4: {mismatches}")
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == "__main__":
+    main()
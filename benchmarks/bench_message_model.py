@@ -0,0 +1,114 @@
+import os
+import sys
+import gc
+import json
+import time
+import random
+import argparse
+import tracemalloc
+
+# Add repo root (lib) and buffer/ (BufferMessage) to Python path
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'buffer'))
+
+from lib.message_model import BaseMessage
+from buffer_message import BufferMessage
+
+# --- BASELINE: the previous dict-backed model ---
+
+class LegacyMessage:
+    def __init__(self, id, date, status, content, subject=None, preview=None,
+                 media=None, source=None, subchannel=None):
+        self.id = str(id)
+        self.date = date
+        self.status = status.lower()
+        self.content = content
+        self.subject = subject
+        self.preview = preview
+        self.media = media if media is not None else []
+        self.source = source
+        self.subchannel = subchannel
+
+    def to_dict(self):
+        return self.__dict__
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+class LegacyBufferMessage(LegacyMessage):
+    def __init__(self, id, date, status, content, metrics=None, link_attachment=None, **kwargs):
+        super().__init__(id, date, status, content, **kwargs)
+        self.metrics = metrics if metrics is not None else {}
+        self.link_attachment = link_attachment
+
+# --- SYNTHETIC ARCHIVE ---
+
+def synthetic_archive(size, seed=7):
+    """Raw DB records as they come out of json.load(): 2/3 LinkedIn posts, 1/3 newsletters."""
+    rng = random.Random(seed)
+    records = []
+    for i in range(size):
+        date = f"20{rng.randint(15, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T10:00:00Z"
+        # Each record is decoded separately in a real DB load, so repeated values are separate objects
+        if i % 3:
+            records.append(json.loads(json.dumps({
+                "id": f"post{i:08d}", "date": date, "status": rng.choice(["sent", "scheduled"]),
+                "content": "lorem ipsum " * rng.randint(5, 60), "subject": None, "preview": None,
+                "media": [{"type": "image", "url": f"/data/linkedin/media/{i:064x}.jpg"}] if i % 4 == 0 else [],
+                "source": "buffer", "subchannel": "linkedin",
+                "metrics": {"impressions": rng.randint(10, 9000), "engagementRate": round(rng.random() * 10, 2)},
+                "link_attachment": None,
+            })))
+        else:
+            records.append(json.loads(json.dumps({
+                "id": str(100000 + i), "date": date, "status": "sent",
+                "content": "newsletter body " * rng.randint(50, 300), "subject": f"Issue #{i}",
+                "preview": "preheader text", "media": [], "source": "aweber", "subchannel": "newsletter",
+            })))
+    return records
+
+def measure(label, records, base_cls, buffer_cls):
+    def load():
+        return [(buffer_cls if 'metrics' in r else base_cls).from_dict(r) for r in records]
+
+    gc.collect()
+    start = time.perf_counter()
+    load()
+    load_time = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    messages = load()
+    # Strings are shared with `records`; what's left is the object overhead itself
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    dicts = [m.to_dict() for m in messages]
+    to_dict_time = time.perf_counter() - start
+    start = time.perf_counter()
+    json.dumps(dicts, ensure_ascii=False)
+    dump_time = time.perf_counter() - start
+
+    print(f"   {label:<8} load {load_time * 1000:7.1f} ms   objects {memory / 1e6:6.2f} MB   "
+          f"to_dict {to_dict_time * 1000:7.1f} ms   json.dumps {dump_time * 1000:7.1f} ms")
+    return messages
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory / load-time of the message model")
+    parser.add_argument('--size', type=int, default=50000)
+    args = parser.parse_args()
+
+    records = synthetic_archive(args.size)
+    print(f"📚 Synthetic archive: {len(records)} messages")
+    legacy = measure("legacy", records, LegacyMessage, LegacyBufferMessage)
+    slotted = measure("slots", records, BaseMessage, BufferMessage)
+
+    for old, new in zip(legacy, slotted):
+        assert old.to_dict() == new.to_dict(), f"Round-trip mismatch for {new.id}"
+    print("✅ Round-trip output identical to the legacy model")
+
+if __name__ == "__main__":
+    main()
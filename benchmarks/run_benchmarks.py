@@ -0,0 +1,302 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import contextlib
+import subprocess
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(BENCH_DIR, '..'))
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+# Add repo root (lib), buffer/, aweber/ and benchmarks/ to Python path
+for path in (ROOT_DIR, os.path.join(ROOT_DIR, 'buffer'), os.path.join(ROOT_DIR, 'aweber'), BENCH_DIR):
+    if path not in sys.path: sys.path.insert(0, path)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# --- STAGES ---
+# Each stage runs in a fresh (spawned) process: setup(workdir, size, images) builds the input,
+# then only the measured call is timed. Peak RSS is the process high-water mark.
+
+def _peak_rss_mb():
+    if resource is None: return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def _buffer_messages(size, media_dir=None):
+    from synthetic import buffer_response, tiny_png
+    from buffer_message import BufferMessage
+
+    image_path = None
+    if media_dir:
+        image_path = os.path.join(media_dir, "bench.png")
+        with open(image_path, 'wb') as f:
+            f.write(tiny_png(800, 600))
+    messages = {}
+    for edge in buffer_response(size)['data']['posts']['edges']:
+        node = edge['node']
+        messages[node['id']] = BufferMessage(
+            id=node['id'], date=node['sentAt'], status=node['status'], content=node['text'],
+            metrics={m['type']: m['value'] for m in node['metrics']},
+            media=[{"type": "image", "url": image_path}] if image_path else [],
+            source="buffer", subchannel="linkedin")
+    return messages
+
+def _linkedin_paths(workdir):
+    from lib.base_utils import get_platform_paths
+    import buffer_dumper
+    buffer_dumper.PATHS = get_platform_paths("linkedin", workdir)
+    return buffer_dumper.PATHS
+
+def stage_parse(workdir, size, images):
+    from synthetic import write_buffer_dump
+    from aweber_stub import AWeberStub
+    from lib.media_store import MediaStore
+    from lib.media_fetcher import MediaFetcher
+    import buffer_dumper
+
+    paths = _linkedin_paths(workdir)
+    stub = AWeberStub([]).start() if images else None
+    dump = os.path.join(workdir, "linkedIn-response.sent.1.json")
+    write_buffer_dump(dump, size, image_base_url=stub.base_url if stub else None)
+
+    def run():
+        # What sync_dumps does for one dump: parse, merge, wait for the image downloads
+        with MediaFetcher(MediaStore(paths['media'])) as fetcher:
+            messages, _, _ = buffer_dumper.parse_dumps([(dump, "sent")], fetcher)
+            fetcher.finalize()
+        return messages
+
+    try:
+        yield run
+    finally:
+        if stub: stub.stop()
+
+def stage_parse_stream(workdir, size, images):
+    """Only decodes one dump post by post (iter_gql_file): peak RSS should not rise above rss_before_mb."""
+    from synthetic import write_buffer_dump
+    import buffer_dumper
+
+    _linkedin_paths(workdir)
+    dump = os.path.join(workdir, "linkedIn-response.sent.1.json")
+    write_buffer_dump(dump, size)
+    yield lambda: sum(1 for _ in buffer_dumper.iter_gql_file(dump, "sent"))
+
+def stage_parse_many(workdir, size, images, workers=None):
+    """
+    `size` posts over 8 dumps (parsed on all cores); each dump repeats the first half of the next one
+    with lower impressions, like overlapping captures taken at different times.
+    """
+    import json
+    from synthetic import buffer_response
+    import buffer_dumper
+
+    _linkedin_paths(workdir)
+    page = max(size // 8, 1)
+    edges = buffer_response(size)['data']['posts']['edges']
+    jobs = []
+    for n in range(8):
+        dump = os.path.join(workdir, f"linkedIn-response.sent.{n}.json")
+        captured = [{"node": dict(e['node'])} for e in edges[n * page:(n + 1) * page + page // 2]]
+        for e in captured[page:]:
+            e['node']['metrics'] = [dict(m, value=m['value'] // 2) for m in e['node']['metrics']]
+        with open(dump, 'w', encoding='utf-8') as f:
+            json.dump({"data": {"posts": {"edges": captured}}}, f, ensure_ascii=False)
+        jobs.append((dump, "sent"))
+
+    class NoFetch:
+        def submit(self, url): return None
+        def attach(self, message, futures): pass
+
+    yield lambda: buffer_dumper.parse_dumps(jobs, NoFetch(), workers=workers or os.cpu_count())
+
+def stage_parse_many_1proc(workdir, size, images):
+    yield from stage_parse_many(workdir, size, images, workers=1)
+
+def stage_clean_html(workdir, size, images):
+    import random
+    from synthetic import fake_newsletter
+    from lib.html_clean import clean_html_batch
+
+    rng = random.Random(5)
+    bodies = [fake_newsletter(rng) for _ in range(size)]
+    yield lambda: clean_html_batch(bodies)
+
+def stage_clean_html_bs4(workdir, size, images):
+    import random
+    from synthetic import fake_newsletter
+    from lib.base_utils import clean_html_content
+
+    rng = random.Random(5)
+    bodies = [fake_newsletter(rng) for _ in range(size)]
+    yield lambda: [clean_html_content(b) for b in bodies]
+
+def stage_to_markdown(workdir, size, images):
+    paths = _linkedin_paths(workdir)
+    messages = _buffer_messages(size, paths['media'] if images else None)
+    yield lambda: [m.to_markdown(i, media_base_path=paths['media']) for i, m in enumerate(messages.values(), 1)]
+
+def stage_save_all(workdir, size, images):
+    from lib.base_utils import save_all
+
+    paths = _linkedin_paths(workdir)
+    messages = _buffer_messages(size, paths['media'] if images else None)
+    yield lambda: save_all(messages, paths, "2024-01-01T00:00:00", "Benchmark", title="Benchmark")
+
+def stage_save_all_noop(workdir, size, images):
+    from lib.base_utils import save_all
+
+    paths = _linkedin_paths(workdir)
+    messages = _buffer_messages(size, paths['media'] if images else None)
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        save_all(messages, paths, "2024-01-01T00:00:00", "Benchmark", title="Benchmark")
+    yield lambda: save_all(messages, paths, "2024-01-01T00:00:00", "Benchmark", title="Benchmark")
+
+def stage_load_db(workdir, size, images, lazy=False):
+    from lib.base_utils import load_db, save_all
+    from buffer_message import BufferMessage
+
+    paths = _linkedin_paths(workdir)
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        save_all(_buffer_messages(size), paths, "2024-01-01T00:00:00", "Benchmark", title="Benchmark")
+    yield lambda: load_db(paths['db'], BufferMessage, lazy=lazy)
+
+def stage_load_db_lazy(workdir, size, images):
+    yield from stage_load_db(workdir, size, images, lazy=True)
+
+def stage_pdf(workdir, size, images):
+    import buffer_dumper
+
+    paths = _linkedin_paths(workdir)
+    messages = _buffer_messages(size, paths['media'] if images else None)
+    if not buffer_dumper.new_pdf_document()[2]:
+        # Without NotoSans fpdf falls back to Helvetica (latin-1 only)
+        for m in messages.values():
+            m.content = m.content.encode('latin-1', 'replace').decode('latin-1')
+    out = os.path.join(workdir, "bench.pdf")
+    yield lambda: buffer_dumper.generate_pdf_archive(messages, out, "Benchmark", use_ghostscript=False)
+
+def stage_aweber_fetch(workdir, size, images, latency=0.02, throttle_rate=0.0, concurrency=4):
+    import requests
+    from synthetic import aweber_broadcasts
+    from aweber_stub import AWeberStub
+    import aweber_dumper
+
+    stub = AWeberStub(aweber_broadcasts(size), latency=latency, throttle_rate=throttle_rate, retry_after=0.2).start()
+    aweber_dumper.API_BASE = stub.api_base
+    try:
+        yield lambda: aweber_dumper.sync_broadcasts(requests.Session(), {}, True, "", concurrency)
+    finally:
+        stub.stop()
+
+STAGES = {
+    "parse": stage_parse,
+    "parse_stream": stage_parse_stream,
+    "parse_many": stage_parse_many,
+    "parse_many_1proc": stage_parse_many_1proc,
+    "clean_html": stage_clean_html,
+    "clean_html_bs4": stage_clean_html_bs4,
+    "to_markdown": stage_to_markdown,
+    "save_all": stage_save_all,
+    "save_all_noop": stage_save_all_noop,
+    "load_db": stage_load_db,
+    "load_db_lazy": stage_load_db_lazy,
+    "pdf": stage_pdf,
+    "aweber_fetch": stage_aweber_fetch,
+}
+
+def run_stage(name, size, images, options):
+    """Runs in the child process."""
+    workdir = tempfile.mkdtemp(prefix=f"bench_{name}_")
+    try:
+        stage = STAGES[name](workdir, size, images, **options)
+        run = next(stage)
+        rss_before = _peak_rss_mb()
+        with contextlib.redirect_stdout(open(os.devnull, 'w')):
+            start = time.perf_counter()
+            run()
+            wall = time.perf_counter() - start
+        stage.close()
+        return {"stage": name, "size": size, "images": images, "wall_s": round(wall, 4),
+                "per_s": round(size / wall, 1) if wall else None,
+                "rss_before_mb": rss_before, "peak_rss_mb": _peak_rss_mb()}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+# --- REPORTING ---
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def compare(results, baseline_path):
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {(r['stage'], r['size'], r['images']): r for r in json.load(f)['results']}
+    print(f"\n📈 Compared with {os.path.basename(baseline_path)} (wall time, >1.0 = slower now):")
+    for r in results:
+        old = baseline.get((r['stage'], r['size'], r['images']))
+        if old and old['wall_s']:
+            ratio = r['wall_s'] / old['wall_s']
+            flag = "⚠️ " if ratio > 1.1 else "  "
+            print(f"   {flag}{r['stage']:<15} n={r['size']:<7} images={str(r['images']):<5} {ratio:5.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporter benchmark suite (synthetic data, local AWeber stub)")
+    parser.add_argument('--stages', default=",".join(s for s in STAGES if s != "clean_html_bs4"),
+                        help=f"Comma-separated subset of: {', '.join(STAGES)}")
+    parser.add_argument('--sizes', default="100,10000", help="Comma-separated message counts, e.g. 100,10000,100000")
+    parser.add_argument('--images', choices=['no', 'yes', 'both'], default='both')
+    parser.add_argument('--latency', type=float, default=0.02, help="AWeber stub latency per request (s)")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="Fraction of stub requests answered with 429")
+    parser.add_argument('--concurrency', type=int, default=4, help="ApiFetcher concurrency for aweber_fetch")
+    parser.add_argument('--compare', help="Previous results JSON to compare against")
+    parser.add_argument('--output', help="Where to write results JSON (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    sizes = [int(s) for s in args.sizes.split(",")]
+    image_modes = {'no': [False], 'yes': [True], 'both': [False, True]}[args.images]
+    fetch_options = {"latency": args.latency, "throttle_rate": args.throttle_rate, "concurrency": args.concurrency}
+
+    results = []
+    ctx = multiprocessing.get_context("spawn")
+    for name in stages:
+        # Images only change the work done by these stages
+        modes = image_modes if name in ("parse", "to_markdown", "save_all", "pdf") else [False]
+        for size in sizes:
+            for images in modes:
+                options = fetch_options if name == "aweber_fetch" else {}
+                with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                    r = pool.submit(run_stage, name, size, images, options).result()
+                results.append(r)
+                print(f"⏱️  {name:<15} n={size:<7} images={str(images):<5} {r['wall_s']:9.3f}s "
+                      f"{r['per_s'] or 0:10.1f}/s  peak RSS {r['peak_rss_mb']} MB")
+
+    report = {"commit": git_commit(), "timestamp": datetime.now().isoformat(timespec='seconds'),
+              "python": platform.python_version(), "platform": platform.platform(),
+              "cpu_count": os.cpu_count(), "results": results}
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}_{report['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Results saved to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import json
+import zlib
+import random
+import struct
+
+# --- SYNTHETIC INPUT GENERATORS ---
+
+WORDS = ("newsletter writing research book chapter draft reader subscriber story idea launch "
+         "zażółć gęślą jaźń — “quoted” & <escaped> café naïve").split()
+
+def sentence(rng, min_words=8, max_words=30):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words)))
+
+def _html_text(text):
+    return text.replace("&", "&amp;").replace("<escaped>", "&lt;escaped&gt;")
+
+def fake_newsletter(rng, paragraphs=25):
+    """Roughly what AWeber's editor produces: nested tables, inline styles, a preheader, a tracking script."""
+    parts = [
+        "<!DOCTYPE html><html><head>",
+        f'<meta name="x-preheader" content="{_html_text(sentence(rng))}">',
+        "<style>td{font-family:Arial}.btn{color:#fff}</style></head><body>",
+        "<!-- preheader --><table width='100%'><tr><td>",
+    ]
+    for _ in range(paragraphs):
+        parts.append(f"<table><tr><td style='padding:10px'><p>{_html_text(sentence(rng))}<br>{_html_text(sentence(rng))}</p>"
+                     f"<a href='https://example.com/?a=1&amp;b=2'>{_html_text(sentence(rng))}</a>&nbsp;&#8212;</td></tr></table>")
+    parts.append("</td></tr></table><script>var t = '<p>tracking</p>';</script></body></html>")
+    return "".join(parts)
+
+def fake_date(rng):
+    return f"20{rng.randint(15, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00Z"
+
+def buffer_response(count, image_base_url=None, seed=1, id_offset=0):
+    """A GetPostList GraphQL response with `count` posts (optionally one image asset each)."""
+    rng = random.Random(seed)
+    edges = []
+    for i in range(id_offset, id_offset + count):
+        node = {
+            "id": f"{i:024x}",
+            "text": "\n\n".join(sentence(rng) for _ in range(rng.randint(1, 6))),
+            "status": "sent",
+            "sentAt": fake_date(rng),
+            "assets": [{"source": f"{image_base_url}/images/{i}.png"}] if image_base_url else [],
+            "metrics": [{"type": "impressions", "value": rng.randint(10, 9000)},
+                        {"type": "engagementRate", "value": round(rng.random() * 10, 2)}],
+            "metadata": {"linkAttachment": {"url": "https://example.com", "title": sentence(rng, 2, 6),
+                                            "text": sentence(rng)}} if i % 4 == 0 else {},
+        }
+        edges.append({"node": node})
+    return {"data": {"posts": {"edges": edges}}}
+
+def write_buffer_dump(path, count, image_base_url=None, seed=1, id_offset=0):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(buffer_response(count, image_base_url, seed, id_offset), f, ensure_ascii=False)
+
+def aweber_broadcasts(count, seed=2):
+    """Broadcast detail records (what a self_link returns), mostly sent, a few drafts/scheduled."""
+    rng = random.Random(seed)
+    statuses = ["sent"] * 18 + ["scheduled", "draft"]
+    return [{
+        "id": 100000 + i,
+        "broadcast_id": 100000 + i,
+        "subject": _html_text(sentence(rng, 3, 10)),
+        "status": rng.choice(statuses),
+        "sent_at": fake_date(rng),
+        "created_at": fake_date(rng),
+        "body_html": fake_newsletter(rng, paragraphs=rng.randint(5, 30)),
+    } for i in range(count)]
+
+def tiny_png(width=64, height=48, seed=0):
+    """A valid RGB PNG built with the standard library only."""
+    rng = random.Random(seed)
+    raw = b"".join(b"\x00" + bytes(rng.randrange(256) for _ in range(width * 3)) for _ in range(height))
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b"")
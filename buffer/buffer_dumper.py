@@ -1,18 +1,30 @@
 import os
 import sys
 import json
-import requests
 import argparse
 import glob
+import time
 import subprocess
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 from buffer_message import BufferMessage 
+from gql_stream import iter_gql_nodes
 
 # Add ../lib to Python path
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
+from lib import instrumentation
 from lib.base_utils import get_platform_paths, load_db, save_all
+# lib.media_fetcher (requests) is imported where downloads actually happen,
+# so `--help`, the multi-exporter runner and no-op runs start fast
+from lib.media_store import MediaStore, referenced_media
+from lib.image_cache import ImageDerivatives
+from lib.ingest_ledger import IngestLedger, open_stamped
+from lib.atomic_io import atomic_write, fsync_dir, write_json
+from lib.metrics_store import open_metrics_store, summary_markdown
+from lib.file_watch import watch_files
+from dump_merge import capture_order, merge_captures, print_merge_report
 
 # --- CONFIG ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -21,6 +33,7 @@ QUEUE_PATTERN = os.path.join(SCRIPT_DIR, 'raw_data_dumps','linkedIn-response.que
 
 BASE_DATA_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, '..', 'data'))
 PATHS = get_platform_paths("linkedin", BASE_DATA_DIR)
+PDF_IMAGE_WIDTH_MM = 150
 
 def download_data():
     """
@@ -29,115 +42,185 @@ def download_data():
     """
     pass
 
-def download_image(url, media_dir, post_id, index):
+def post_from_node(node, status_fallback):
+    """BufferMessage fields of a GraphQL post node (media still empty) and its image URLs in asset order."""
+    mdate = node.get('sentAt') or node.get('dueAt') or node.get('createdAt')
+    metrics = {m['type']: m['value'] for m in node.get('metrics') or [] if m.get('value') is not None}
+    
+    link_att = None
+    la = (node.get('metadata') or {}).get('linkAttachment')
+    if la: link_att = {"url": la.get('url'), "title": la.get('title'), "text": la.get('text')}
+
+    data = dict(
+        id=node.get('id'), date=mdate, status=(node.get('status') or status_fallback).lower(),
+        content=node.get('text', ""),
+        subject=None,
+        preview=None,
+        metrics=metrics, link_attachment=link_att, media=[],
+        source="buffer", subchannel="linkedin"
+    )
+    return data, [asset['source'] for asset in node.get('assets') or [] if asset.get('source')]
+
+def iter_gql_file(filepath, status_fallback, stamp=None):
     """
-    Downloads an image from a URL and saves it locally. 
+    Streams a Buffer GraphQL dump (single response, concatenated responses or HAR export) and yields
+    (BufferMessage fields, image URLs) as soon as each post is decoded, in constant memory.
+    `stamp` (a dict) receives the size, mtime and sha256 of the bytes read, for the ingest ledger.
+    Raises ValueError (json.JSONDecodeError, UnicodeDecodeError) on malformed input after yielding
+    everything readable before it.
     """
-    if not url: return None
-    ext = ".jpg"
-    if ".png" in url.lower(): ext = ".png"
-    elif ".gif" in url.lower(): ext = ".gif"
-    
-    filename = f"{post_id}_{index}{ext}"
-    local_path = os.path.join(media_dir, filename)
-    if os.path.exists(local_path): return local_path
+    with open_stamped(filepath, {} if stamp is None else stamp) as f:
+        for node in iter_gql_nodes(f):
+            yield post_from_node(node, status_fallback)
 
+def read_dump(job, emit):
+    """
+    Streams one dump, calling emit((fields, image URLs)) for every post. Returns (stamp, posts, error)
+    where `stamp` is the size, mtime and sha256 of the bytes parsed (None if the file is missing) and
+    `posts` their count. A malformed file emits what was readable and returns the error.
+    """
+    filepath, status_fallback = job
+    if not os.path.exists(filepath): return None, 0, "file not found"
+    stamp, posts = {}, 0
     try:
-        resp = requests.get(url, timeout=10)
-        if resp.status_code == 200:
-            with open(local_path, 'wb') as f:
-                f.write(resp.content)
-            return local_path
-    except: return None
-    return None
-
-def parse_gql_file(filepath, status_fallback):
+        for post in iter_gql_file(filepath, status_fallback, stamp):
+            emit(post)
+            posts += 1
+    except (json.JSONDecodeError, UnicodeDecodeError, ValueError) as e:
+        return stamp, posts, f"error decoding JSON after {posts} post(s): {e}"
+    return stamp, posts, None
+
+# Worker processes send decoded posts back in batches of this size while they are still reading
+POST_BATCH = 256
+_post_queue = None
+
+def _init_parse_worker(queue):
+    global _post_queue
+    _post_queue = queue
+
+def _stream_dump(job):
+    """read_dump in a worker process: posts go to the parent in batches, then a final (path, None, result)."""
+    path = job[0]
+    batch = []
+
+    def emit(post):
+        batch.append(post)
+        if len(batch) >= POST_BATCH:
+            _post_queue.put((path, batch[:], None))
+            batch.clear()
+
+    result = read_dump(job, emit)
+    if batch: _post_queue.put((path, batch, None))
+    _post_queue.put((path, None, result))
+
+def _parse_on_pool(to_parse, workers):
     """
-    Parses a Buffer GraphQL JSON dump file from Buffer for social media posts. (LinkedIn in my case)
-    Returns a dictionary of BufferMessage objects keyed by message ID.
+    Runs _stream_dump for every dump on `workers` processes and yields what they send, as it arrives:
+    (path, [(fields, image URLs)], None) batches and one (path, None, read_dump result) per dump.
     """
-    if not os.path.exists(filepath):
-        print(f"ℹ️ File not found: {os.path.basename(filepath)}")
-        return {}
-    
-    print(f"📖 Loading file: {os.path.basename(filepath)}...")
-    with open(filepath, 'r', encoding='utf-8') as f:
-        try:
-            raw = json.load(f)
-        except json.JSONDecodeError:
-            print(f"❌ Error decoding JSON in {filepath}")
-            return {}
+    import queue as queue_errors
+    import multiprocessing
+
+    queue = multiprocessing.Queue()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_parse_worker, initargs=(queue,)) as pool:
+        futures = [pool.submit(_stream_dump, job) for job in to_parse]
+        pending = len(to_parse)
+        while pending:
+            try:
+                item = queue.get(timeout=1.0)
+            except queue_errors.Empty:
+                # A worker that died (or raised) never sends its final item
+                for future in futures:
+                    if future.done() and future.exception(): raise future.exception()
+                continue
+            if item[1] is None: pending -= 1
+            yield item
+    queue.close()
+
+def parse_dumps(to_parse, fetcher, metrics=None, previous=None, workers=1):
+    """
+    Parses [(path, status fallback)] on up to `workers` processes and merges posts found in several
+    dumps with the deterministic policy of dump_merge. Dumps are streamed: images are queued on
+    `fetcher` as soon as a post is decoded (workers send posts back in batches of POST_BATCH), and
+    only the captures themselves (one per post and dump) are kept until the merge.
+    `previous` {id: message} (the stored archive) takes part in the merge as the oldest capture.
+    Returns ({id: BufferMessage}, merge report, {path: stamp of the bytes parsed}).
+    """
+    workers = max(1, min(workers, len(to_parse)))
+    print(f"📖 Parsing {len(to_parse)} dump(s) on {workers} process(es)...")
+    posts_by_dump, stamps, captures = {path: [] for path, _ in to_parse}, {}, []
+
+    def add_posts(path, posts):
+        for data, image_urls in posts:
+            for url in image_urls: fetcher.submit(url)
+        posts_by_dump[path].extend(posts)
+
+    def dump_done(path, result):
+        stamp, count, error = result
+        if stamp: stamps[path] = stamp
+        if error: print(f"❌ {os.path.basename(path)}: {error}")
+        elif not count: print(f"⚠️ No posts found in {os.path.basename(path)}")
+        instrumentation.count("posts_parsed", count)
+        captured = stamp['mtime_ns'] // 10**9 if stamp else 0
+        captures.extend({"path": path, "taken": captured, "data": data, "assets": image_urls}
+                        for data, image_urls in posts_by_dump.pop(path))
+
+    if workers == 1:
+        for job in to_parse:
+            dump_done(job[0], read_dump(job, lambda post, path=job[0]: add_posts(path, [post])))
+    else:
+        for path, posts, result in _parse_on_pool(to_parse, workers):
+            if posts is None: dump_done(path, result)
+            else: add_posts(path, posts)
 
+    if metrics is not None:
+        # One snapshot per dump, oldest first, stamped with the time the dump was saved
+        by_dump = {}
+        for capture in sorted(captures, key=capture_order):
+            by_dump.setdefault((capture['taken'], capture['path']), []).append(BufferMessage(**capture['data']))
+        for (taken, _), snapshot in by_dump.items():
+            metrics.record(snapshot, taken=taken)
+
+    merged, report = merge_captures(captures, previous)
     messages = {}
-    edges = raw.get('data', {}).get('posts', {}).get('edges', [])
-    
-    for edge in edges:
-        node = edge.get('node', {})
-        mid = node.get('id')
-        mdate = node.get('sentAt') or node.get('dueAt') or node.get('createdAt')
-        text = node.get('text', "")
-        
-        print(f"   + Processing message: {mid[:10]}...")
-        
-        # Media & Metrics
-        media_list = []
-        for i, asset in enumerate(node.get('assets', [])):
-            source_url = asset.get('source')
-            if source_url:
-                print(f"      ↓ Downloading image for message {mid[:10]} (asset {i})...")
-                loc = download_image(source_url, PATHS['media'], mid, i)
-                if loc: media_list.append({"type": "image", "url": loc})
-        
-        metrics = {m['type']: m['value'] for m in node.get('metrics', []) if m.get('value') is not None}
-        
-        link_att = None
-        la = node.get('metadata', {}).get('linkAttachment')
-        if la: link_att = {"url": la.get('url'), "title": la.get('title'), "text": la.get('text')}
-
-        messages[mid] = BufferMessage(
-            id=mid, date=mdate, status=node.get('status') or status_fallback,
-            content=text, 
-            subject=None,
-            preview=None,
-            metrics=metrics, link_attachment=link_att, media=media_list,
-            source="buffer", subchannel="linkedin"
-        )
-        
-    return messages
+    for mid, (data, image_urls) in merged.items():
+        messages[mid] = BufferMessage(**data)
+        fetcher.attach(messages[mid], [fetcher.submit(url) for url in image_urls])
+    return messages, report, stamps
 
 def compress_pdf(input_path, output_path):
     """Calls Ghostscript to compress a PDF file."""
 
     print(f"🗜️  Compressing PDF using Ghostscript...")
+    # gs writes next to the target, which is only replaced once compression succeeded
+    tmp_path = f"{output_path}.gs.part"
     cmd = [
         "gs", "-sDEVICE=pdfwrite", "-dCompatibilityLevel=1.4",
         "-dPDFSETTINGS=/screen", "-dNOPAUSE", "-dQUIET", "-dBATCH",
-        f"-sOutputFile={output_path}", input_path
+        f"-sOutputFile={tmp_path}", input_path
     ]
     try:
-        subprocess.run(cmd, check=True)
+        with instrumentation.span("pdf.ghostscript"):
+            subprocess.run(cmd, check=True)
+        os.replace(tmp_path, output_path)
+        fsync_dir(os.path.dirname(os.path.abspath(output_path)))
         # Remove the temporary file after successful compression
         if input_path != output_path and os.path.exists(input_path):
             os.remove(input_path)
     except subprocess.CalledProcessError as e:
-        print(f"⚠️  Ghostscript failed: {e}")
+        print(f"⚠️  Ghostscript failed, keeping the uncompressed PDF: {e}")
+        os.replace(input_path, output_path)
     except FileNotFoundError:
         print("⚠️  Ghostscript (gs) not found in system. Compression skipped.")
         # If Ghostscript is not available, just rename the input to output
-        os.rename(input_path, output_path) 
+        os.replace(input_path, output_path)
+    finally:
+        if os.path.exists(tmp_path): os.remove(tmp_path)
 
-def generate_pdf_archive(messages, output_path, title):
-    """Generates a PDF with Unicode support and automatic compression."""
-    try:
-        from fpdf import FPDF
-        from fpdf.enums import XPos, YPos
-    except ImportError:
-        print("⚠️ fpdf2 not installed. Skipping PDF generation. (pip install fpdf2)")
-        return
+def new_pdf_document():
+    """Creates an FPDF document with NotoSans (if found) and returns it with a safe font setter."""
+    from fpdf import FPDF
 
-    temp_pdf = output_path.replace(".pdf", ".raw.pdf")
-    print(f"🎨 Rendering raw PDF: {os.path.basename(temp_pdf)}...")
-    
     pdf = FPDF()
     pdf.set_auto_page_break(auto=True, margin=15)
     
@@ -169,30 +252,47 @@ def generate_pdf_archive(messages, output_path, title):
         else:
             pdf.set_font("Helvetica", style, size)
 
-    pdf.add_page()
-    set_safe_font("B", 16)
-    pdf.cell(0, 10, title, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
-    set_safe_font("I", 10)
-    pdf.cell(0, 10, f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
-    pdf.ln(10)
+    return pdf, set_safe_font, has_unicode_font
+
+def render_pdf_chunk(job):
+    """
+    Renders one slice of the date-sorted archive into its own PDF (runs in a worker process).
+    Post numbering starts at job['start_index']; every post gets an outline (bookmark) entry.
+    Returns (path, images downscaled, images from cache, instrumentation data); with job['instrument']
+    the spans/counters recorded here are returned for the parent to merge, else the data is None.
+    """
+    from fpdf.enums import XPos, YPos
 
-    sorted_msgs = sorted(messages.values(), key=lambda x: x.date, reverse=True)
+    if job['instrument']: instrumentation.enable()
 
-    for i, msg in enumerate(sorted_msgs, 1):
+    pdf, set_safe_font, has_unicode_font = new_pdf_document()
+    derivatives = ImageDerivatives(PATHS['image_cache'], width_mm=PDF_IMAGE_WIDTH_MM, dpi=job['image_dpi'])
+
+    pdf.add_page()
+    if job['title']:
+        set_safe_font("B", 16)
+        pdf.cell(0, 10, job['title'], new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
+        set_safe_font("I", 10)
+        pdf.cell(0, 10, f"Generated on: {job['generated']}", new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
+        pdf.ln(10)
+
+    for i, msg in enumerate(job['messages'], job['start_index']):
+        heading = f"{i}. Post from {msg['date']} ({msg['status'].upper()})"
+        pdf.start_section(heading)
         set_safe_font("B", 12)
-        pdf.cell(0, 10, f"{i}. Post from {msg.date} ({msg.status.upper()})", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.cell(0, 10, heading, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
         set_safe_font("", 10)
         
         # Notice: fpdf2 will issue warnings about missing glyphs (emoji), 
         # but it will generate text with dots/question marks instead of them.
-        clean_text = msg.content if has_unicode_font else msg.content.encode('cp1250', 'replace').decode('cp1250')
+        clean_text = msg['content'] if has_unicode_font else msg['content'].encode('cp1250', 'replace').decode('cp1250')
         pdf.multi_cell(0, 5, clean_text)
         pdf.ln(2)
         
-        for item in msg.media:
+        for item in msg['media']:
             if item['type'] == 'image' and os.path.exists(item['url']):
                 try:
-                    pdf.image(item['url'], x=10, w=150)
+                    pdf.image(derivatives.get(item['url']), x=10, w=PDF_IMAGE_WIDTH_MM)
                     pdf.ln(5)
                 except Exception as e:
                     set_safe_font("I", 8)
@@ -202,56 +302,233 @@ def generate_pdf_archive(messages, output_path, title):
         pdf.line(10, pdf.get_y(), 200, pdf.get_y())
         pdf.ln(5)
 
-    pdf.output(temp_pdf)
-    
-    # Final compression step
-    compress_pdf(temp_pdf, output_path)
+    raw_path = job['path'].replace(".pdf", ".raw.pdf") if job['use_ghostscript'] else job['path']
+    with atomic_write(raw_path, 'wb') as f:
+        f.write(pdf.output())
+    if job['use_ghostscript']:
+        compress_pdf(raw_path, job['path'])
+    return job['path'], derivatives.created, derivatives.reused, instrumentation.collect() if job['instrument'] else None
 
-def main():
-    parser = argparse.ArgumentParser(description="Buffer/LinkedIn Local Parser")
-    parser.add_argument('--full', action='store_true')
-    parser.add_argument('--pdf', action='store_true', help="Generate compressed PDF archive")
-    args = parser.parse_args()
+def merge_pdfs(chunk_paths, output_path):
+    """Concatenates chunk PDFs (keeping their outlines) into output_path."""
+    from pypdf import PdfWriter
 
-    if args.full and os.path.exists(PATHS['db']):
-        os.rename(PATHS['db'], f"{PATHS['db']}.bak")
+    writer = PdfWriter()
+    for path in chunk_paths:
+        writer.append(path, import_outline=True)
+    with atomic_write(output_path, 'wb') as f:
+        writer.write(f)
+    writer.close()
 
-    # 1. Load existing DB from json
-    last_sync, list_name, messages = load_db(PATHS['db'], BufferMessage)
-    
-    # 2. Incremental update: keep only sent messages before parsing new dumps
-    if not args.full:
-        messages = {mid: m for mid, m in messages.items() if m.status == 'sent'}
+def generate_pdf_archive(messages, output_path, title, image_dpi=150, use_ghostscript=True, workers=1, chunk_size=100):
+    """
+    Generates a PDF with Unicode support, print-size images and a clickable outline.
+    Images are downscaled once to `image_dpi` and cached; Ghostscript compression is optional.
+    With workers > 1 the archive is rendered (and compressed) in chunks on a process pool and merged.
+    """
+    try:
+        import fpdf
+    except ImportError:
+        print("⚠️ fpdf2 not installed. Skipping PDF generation. (pip install fpdf2)")
+        return
+
+    if workers > 1:
+        try:
+            import pypdf
+        except ImportError:
+            print("⚠️ pypdf not installed. Rendering PDF in a single process. (pip install pypdf)")
+            workers = 1
+
+    sorted_msgs = [m.to_dict() for m in sorted(messages.values(), key=lambda x: x.date, reverse=True)]
+    if workers <= 1: chunk_size = max(len(sorted_msgs), 1)
+    chunks = [sorted_msgs[i:i + chunk_size] for i in range(0, len(sorted_msgs), chunk_size)] or [[]]
+
+    generated = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    jobs = [{
+        "messages": chunk,
+        "start_index": n * chunk_size + 1,
+        "title": title if n == 0 else None,
+        "generated": generated,
+        "image_dpi": image_dpi,
+        "use_ghostscript": use_ghostscript,
+        # Chunks rendered in worker processes record their own spans/counters and hand them back
+        "instrument": len(chunks) > 1 and instrumentation.is_enabled(),
+        "path": output_path if len(chunks) == 1 else output_path.replace(".pdf", f".part{n:03d}.pdf"),
+    } for n, chunk in enumerate(chunks)]
+
+    print(f"🎨 Rendering PDF: {len(sorted_msgs)} posts in {len(jobs)} chunk(s) on {min(workers, len(jobs))} process(es)...")
+    with instrumentation.span("pdf.render"):
+        if len(jobs) == 1:
+            results = [render_pdf_chunk(jobs[0])]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(render_pdf_chunk, jobs))
+    for r in results:
+        instrumentation.merge(r[3])
+    print(f"🖼️  Images: {sum(r[1] for r in results)} downscaled, {sum(r[2] for r in results)} from cache.")
+    instrumentation.count("pdf_images_downscaled", sum(r[1] for r in results))
+    instrumentation.count("pdf_images_cached", sum(r[2] for r in results))
+
+    if len(jobs) > 1:
+        print(f"📎 Merging {len(jobs)} chunks into {os.path.basename(output_path)}...")
+        with instrumentation.span("pdf.merge"):
+            merge_pdfs([r[0] for r in results], output_path)
+        for path, _, _, _ in results:
+            os.remove(path)
 
+def sync_dumps(messages, ledger, store, args, full=False):
+    """
+    One ingestion pass: parses dumps that are new or changed since the ledger last saw them,
+    then saves DB + Markdown and records the parsed files. `messages` is updated in place.
+    The export is regenerated even when no dump changed, so export options (--shard-tokens,
+    --dedup, --metrics-summary, ...) always apply.
+    Returns the number of files parsed (None if there are no dumps and nothing to export).
+    """
     print("📥 Scanning for GQL dumps...")
     sent_files = sorted(glob.glob(SENT_PATTERN))
     queue_files = sorted(glob.glob(QUEUE_PATTERN))
-
     if not sent_files and not queue_files:
         print("⚠️ No input files found matching patterns.")
-        if not messages: return
+        if not ledger.entries and not messages: return None
+
+    fresh = not ledger.entries
+    removed = ledger.prune(sent_files + queue_files)
+    new_sent = [f for f in sent_files if full or not ledger.unchanged(f)]
+    # The queue dump is a snapshot of what is scheduled right now, so any change means re-reading all of it
+    queue_changed = (full or fresh or any(e.get('kind') == "scheduled" for e in removed.values())
+                     or any(not ledger.unchanged(f) for f in queue_files))
+
+    skipped = len(sent_files) - len(new_sent) + (0 if queue_changed else len(queue_files))
+    if skipped: print(f"⏭️  {skipped} dump(s) unchanged since last run, skipped.")
 
-    for f in sent_files:
-        messages.update(parse_gql_file(f, "sent"))
-    for f in queue_files:
-        messages.update(parse_gql_file(f, "scheduled"))
+    if queue_changed:
+        for mid in [mid for mid, m in messages.items() if m.status != 'sent']:
+            del messages[mid]
+    to_parse = [(f, "sent") for f in new_sent] + ([(f, "scheduled") for f in queue_files] if queue_changed else [])
+
+    metrics = open_metrics_store(PATHS['metrics'])
+    stamps = {}
+    if to_parse:
+        from lib.media_fetcher import MediaFetcher
+
+        # Parsing keeps going while images download in the background
+        with MediaFetcher(store, max_workers=args.workers, revalidate=not args.no_revalidate) as fetcher:
+            with instrumentation.span("parse"):
+                parsed, merge_report, stamps = parse_dumps(to_parse, fetcher, metrics, previous=messages,
+                                                           workers=args.parse_workers)
+                messages.update(parsed)
+            print("⏳ Waiting for media downloads...")
+            with instrumentation.span("media.wait"):
+                fetcher.finalize()
+            fetcher.report()
+
+        print_merge_report(merge_report)
+        write_json(PATHS['merge_report'], dict(merge_report, generated=datetime.now().isoformat(timespec='seconds')),
+                   indent=2)
+
+    summary = None
+    if metrics is not None:
+        with instrumentation.span("metrics"):
+            if to_parse: metrics.save()
+            if args.metrics_summary:
+                summary = summary_markdown(metrics, {mid: m for mid, m in messages.items() if m.status == 'sent'})
 
-    # 3. Save everything (JSON + MD) in one call
     last_sync = datetime.now().isoformat()
     save_all(
         messages, 
         PATHS, 
         last_sync, 
         list_name="LinkedIn (Buffer)", 
-        title="LinkedIn Archive"
+        title="LinkedIn Archive",
+        skip_unchanged_export=args.skip_unchanged,
+        shard_tokens=args.shard_tokens,
+        shard_bytes=args.shard_bytes,
+        dedup=args.dedup,
+        summary=summary,
+        backup=full
     )
-    
-    # 4. Generate and compress PDF
-    if args.pdf:
-        pdf_path = PATHS['export'].replace(".md", ".pdf")
-        generate_pdf_archive(messages, pdf_path, "LinkedIn Archive (Adam Korga)")
-    
-    print(f"✅ Sync complete. Total messages in archive: {len(messages)}")
+
+    # Only recorded once the data is safely saved
+    for f, status in to_parse:
+        if f in stamps: ledger.record(f, status, stamps[f])
+    ledger.save()
+    if not to_parse: return 0
+    instrumentation.count("dumps_parsed", len(to_parse))
+
+    with instrumentation.span("media.gc"):
+        removed_media = store.collect_garbage(referenced_media(messages))
+    if removed_media: print(f"🧹 Removed {removed_media} unreferenced media file(s).")
+    return len(to_parse)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Buffer/LinkedIn Local Parser")
+    parser.add_argument('--full', action='store_true')
+    parser.add_argument('--skip-unchanged', action='store_true', help="Don't rewrite the Markdown export if its content is unchanged")
+    parser.add_argument('--shard-tokens', type=int, help="Split the export into shards of ~N tokens")
+    parser.add_argument('--shard-bytes', type=int, help="Split the export into shards of at most N bytes")
+    parser.add_argument('--dedup', action='store_true', help="Collapse near-duplicates of earlier messages (any platform) in the export")
+    parser.add_argument('--metrics-summary', action='store_true', help="Add an engagement summary (per month, top posts) to the export")
+    parser.add_argument('--pdf', action='store_true', help="Generate compressed PDF archive")
+    parser.add_argument('--pdf-dpi', type=int, default=150, help="Resolution of images embedded in the PDF")
+    parser.add_argument('--no-gs', action='store_true', help="Skip the Ghostscript compression pass")
+    parser.add_argument('--pdf-workers', type=int, default=1, help="Render the PDF in parallel chunks on N processes")
+    parser.add_argument('--pdf-chunk-size', type=int, default=100, help="Posts per chunk in parallel PDF mode")
+    parser.add_argument('--workers', type=int, default=8, help="Parallel media downloads")
+    parser.add_argument('--parse-workers', type=int, default=os.cpu_count() or 1, help="Processes parsing dumps in parallel")
+    parser.add_argument('--no-revalidate', action='store_true', help="Trust cached media, skip conditional requests")
+    parser.add_argument('--watch', action='store_true', help="Keep running and ingest new dumps as soon as they are saved")
+    parser.add_argument('--debounce', type=float, default=1.0, help="Seconds without file changes before a --watch sync")
+    parser.add_argument('--report', action='store_true', help="Record per-stage timings/counters into a JSON run report")
+    parser.add_argument('--profile', action='store_true', help="Also dump cProfile stats (implies --report)")
+    args = parser.parse_args(argv)
+
+    if args.report or args.profile:
+        instrumentation.enable(profile=args.profile)
+    else:
+        instrumentation.disable()
+
+    # The run report is written even when the run stops early or fails
+    messages = {}
+    try:
+        # 1. Load existing DB (--full rebuilds from the dumps; the DB is backed up and replaced only on save)
+        with instrumentation.span("load_db"):
+            last_sync, list_name, messages = load_db(PATHS['db'], BufferMessage, lazy=True)
+        if args.full: messages = {}
+
+        ledger = IngestLedger(PATHS['ingest_ledger'])
+        if args.full or not os.path.exists(PATHS['db']):
+            ledger.reset()
+
+        # 2. Parse new/changed dumps, save DB + MD
+        store = MediaStore(PATHS['media'])
+        parsed = sync_dumps(messages, ledger, store, args, full=args.full)
+        if parsed is None and not messages and not args.watch: return {"messages": 0, "dumps_parsed": 0}
+
+        if args.watch:
+            print(f"👀 Watching {os.path.dirname(SENT_PATTERN)} for new dumps (Ctrl+C to stop)...")
+            try:
+                for changed in watch_files([SENT_PATTERN, QUEUE_PATTERN], debounce=args.debounce):
+                    print(f"🔔 Change detected: {', '.join(os.path.basename(p) for p in changed)}")
+                    started = time.perf_counter()
+                    with instrumentation.span("watch.sync"):
+                        sync_dumps(messages, ledger, store, args)
+                    print(f"⚡ Synced in {time.perf_counter() - started:.2f}s. {len(messages)} messages in archive. Waiting...")
+            except KeyboardInterrupt:
+                print("\n🛑 Watch stopped.")
+
+        # 3. Generate and compress PDF
+        if args.pdf:
+            pdf_path = PATHS['export'].replace(".md", ".pdf")
+            with instrumentation.span("pdf"):
+                generate_pdf_archive(messages, pdf_path, "LinkedIn Archive (Adam Korga)",
+                                     image_dpi=args.pdf_dpi, use_ghostscript=not args.no_gs,
+                                     workers=args.pdf_workers, chunk_size=args.pdf_chunk_size)
+
+        print(f"✅ Sync complete. Total messages in archive: {len(messages)}")
+        return {"messages": len(messages), "dumps_parsed": parsed or 0}
+    finally:
+        instrumentation.finish(PATHS['run_report'], PATHS['profile'] if args.profile else None,
+                               messages=len(messages))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
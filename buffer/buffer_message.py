@@ -9,6 +9,8 @@ class BufferMessage(BaseMessage):
     """
     Extends BaseMessage to include social media specific fields like metrics and link attachments.
     """
+    __slots__ = ('metrics', 'link_attachment')
+
     def __init__(self, id, date, status, content, metrics=None, link_attachment=None, **kwargs):
         super().__init__(id, date, status, content, **kwargs)
         self.metrics = metrics if metrics is not None else {}
@@ -0,0 +1,103 @@
+import os
+import json
+
+from lib.metrics_store import is_rate
+
+# --- MERGING POSTS CAPTURED IN SEVERAL DUMPS ---
+# The same post often shows up in more than one dump (overlapping pages, a queue dump taken before it
+# went out, re-captures with newer metrics). Instead of letting the last file parsed win, every post is
+# merged field by field from all its captures, oldest to newest (dump modification time, then file name),
+# so the result doesn't depend on glob or completion order:
+#   * status: a sent capture beats a scheduled one; the date comes from the capture that set the status,
+#   * metrics: counts keep the highest value seen, rates (engagementRate, ...) the newest one,
+#   * everything else (text, link attachment, images): the newest capture that has a value.
+# Captures that disagree on a field are listed in the merge report. Metrics are expected to grow between
+# captures, so they are only counted there (posts whose metrics changed), not listed as conflicts.
+
+def capture_order(capture):
+    return capture['taken'], capture['path']
+
+def _merge_metrics(values):
+    """`values`: metric dicts oldest first."""
+    merged = {}
+    for metrics in values:
+        for metric, value in metrics.items():
+            if metric in merged and not is_rate(metric):
+                try:
+                    value = max(merged[metric], value)
+                except TypeError:
+                    pass
+            merged[metric] = value
+    return merged
+
+def _pick_newest(values):
+    """The newest non-empty value (else the newest one) of `values`, oldest first."""
+    return next((v for v in reversed(values) if v), values[-1])
+
+def merge_post(captures, previous=None):
+    """
+    Merges one post's captures ({"path", "taken", "data", "assets"}, sorted with capture_order) and
+    the already stored version `previous` (its fields without content, treated as older than any capture).
+    Returns (fields, image URLs, conflicts) where conflicts is {field: values}, one value per capture
+    ('metrics' is included when they changed; merge_captures counts it separately).
+    """
+    newest = captures[-1]
+    if len(captures) == 1 and previous is None: return newest['data'], newest['assets'], {}
+
+    datas = [c['data'] for c in captures]
+    data, conflicts = {}, {}
+    for field in newest['data']:
+        values = [d.get(field) for d in datas]
+        data[field] = values[0]
+        for value in values:
+            if value != values[0]:
+                conflicts[field], data[field] = values, _pick_newest(values)
+                break
+    assets = [c['assets'] for c in captures]
+    if any(a != assets[0] for a in assets): conflicts['assets'] = assets
+
+    timeline = ([previous] if previous else []) + datas
+    sent = [d for d in timeline if d.get('status') == 'sent']
+    status_source = sent[-1] if sent else timeline[-1]
+    data['status'], data['date'] = status_source.get('status'), status_source.get('date')
+    data['metrics'] = _merge_metrics([d.get('metrics') or {} for d in timeline])
+    return data, _pick_newest(assets) if 'assets' in conflicts else assets[0], conflicts
+
+def merge_captures(captures, previous=None):
+    """
+    Merges all captures (one per post per dump) into {id: (fields, image URLs)}.
+    `previous` {id: message} holds the stored messages; only those of posts captured again are read.
+    Returns (merged, report) with the conflicts in a JSON-serializable report.
+    """
+    by_id = {}
+    for capture in sorted(captures, key=capture_order):
+        by_id.setdefault(capture['data']['id'], []).append(capture)
+
+    names = {c['path']: os.path.basename(c['path']) for c in captures}
+    merged, conflicts, recaptured, metrics_changed = {}, [], 0, 0
+    for mid, post_captures in by_id.items():
+        if len(post_captures) > 1: recaptured += 1
+        stored = previous.get(mid) if previous else None
+        data, assets, post_conflicts = merge_post(post_captures, stored.to_record()[0] if stored else None)
+        merged[mid] = (data, assets)
+        if post_conflicts.pop('metrics', None) is not None: metrics_changed += 1
+        for field, values in post_conflicts.items():
+            conflicts.append({
+                "id": mid, "field": field, "chosen": assets if field == 'assets' else data.get(field),
+                "captures": [{"file": names[c['path']], "taken": c['taken'], "value": v}
+                             for c, v in zip(post_captures, values)],
+            })
+
+    report = {"dumps": len(names), "posts": len(merged),
+              "posts_in_several_dumps": recaptured, "metrics_changed": metrics_changed, "conflicts": conflicts}
+    return merged, report
+
+def print_merge_report(report, limit=5):
+    conflicts = report['conflicts']
+    print(f"⚖️  Merged {report['posts']} post(s) from {report['dumps']} dump(s): "
+          f"{report['posts_in_several_dumps']} captured more than once, {report['metrics_changed']} with updated metrics, "
+          f"{len(conflicts)} conflicting field(s).")
+    for conflict in conflicts[:limit]:
+        values = ", ".join(f"{c['file']}={json.dumps(c['value'], ensure_ascii=False)[:40]}" for c in conflict['captures'])
+        print(f"   - {conflict['id'][:10]} {conflict['field']}: {values}")
+    if len(conflicts) > limit: print(f"   ... and {len(conflicts) - limit} more (see the merge report).")
@@ -0,0 +1,139 @@
+import re
+import json
+import base64
+
+# --- STREAMING GRAPHQL DUMP READER ---
+# Walks `posts.edges[*].node` without decoding the whole file (edges of other connections in the same
+# response are skipped). Works for:
+#   * a single GetPostList response (what "Copy Response" gives you),
+#   * several responses concatenated in one file (or one per line),
+#   * HAR exports ("Save all as HAR") bundling many GetPostList requests.
+# Only one edge (or one HAR entry) is held in memory at a time.
+
+CHUNK_SIZE = 1024 * 1024
+_ARRAY_RE = re.compile(r'"(posts|entries)"\s*:\s*([{\[])')
+_EDGES_RE = re.compile(r'"edges"\s*:\s*\[')
+_STRING_RE = re.compile(r'"(?:[^"\\]|\\.)*"')
+_SEPARATOR_RE = re.compile(r'[\s,]*')
+_decoder = json.JSONDecoder()
+
+class _Reader:
+    """Sliding text buffer over a file object."""
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        if self.eof: return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def find_array(self):
+        """
+        Advances past the next `"posts": {... "edges": [` / `"entries": [`.
+        Returns 'edges' / 'entries', or None at EOF.
+        """
+        while True:
+            m = _ARRAY_RE.search(self.buf, self.pos)
+            if m:
+                self.pos = m.end()
+                if m.group(1) == 'entries':
+                    if m.group(2) == '[': return 'entries'
+                elif m.group(2) == '{' and self.find_member(_EDGES_RE):
+                    return 'edges'
+                continue
+            # Keep a small tail so a key split between chunks is still found
+            self.pos = max(self.pos, len(self.buf) - 32)
+            if not self.fill(): return None
+
+    def find_member(self, key_re):
+        """
+        With pos just inside an object, advances past its member matching `key_re` and returns True,
+        or past the object's closing brace and returns False. Nested values and strings are skipped.
+        """
+        depth = 1
+        while True:
+            if len(self.buf) - self.pos < 64 and self.fill(): continue
+            if self.pos >= len(self.buf): return False
+            c = self.buf[self.pos]
+            if c == '"':
+                m = depth == 1 and key_re.match(self.buf, self.pos)
+                if m:
+                    self.pos = m.end()
+                    return True
+                m = _STRING_RE.match(self.buf, self.pos)
+                if not m:
+                    # The string runs past the buffer
+                    if not self.fill(): return False
+                    continue
+                self.pos = m.end()
+                continue
+            if c in '{[':
+                depth += 1
+            elif c in '}]':
+                depth -= 1
+                if depth == 0:
+                    self.pos += 1
+                    return False
+            self.pos += 1
+
+    def next_item(self):
+        """Decodes the next array element. Returns (True, value), or (False, None) at the closing bracket."""
+        while True:
+            self.pos = _SEPARATOR_RE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                if self.buf[self.pos] == ']':
+                    self.pos += 1
+                    return False, None
+                try:
+                    value, end = _decoder.raw_decode(self.buf, self.pos)
+                    # A number/literal touching the buffer end may still be incomplete
+                    if end < len(self.buf) or self.eof:
+                        self.pos = end
+                        return True, value
+                except json.JSONDecodeError:
+                    if self.eof: raise
+            if not self.fill():
+                if self.pos >= len(self.buf):
+                    raise json.JSONDecodeError("Unexpected end of file inside array", self.buf, self.pos)
+
+def _nodes_from_response(raw):
+    edges = (((raw or {}).get('data') or {}).get('posts') or {}).get('edges') or []
+    for edge in edges:
+        node = edge.get('node') if isinstance(edge, dict) else None
+        if node: yield node
+
+def _nodes_from_har_entry(entry):
+    if not isinstance(entry, dict): return
+    if 'GetPostList' not in (entry.get('request') or {}).get('url', ''): return
+    content = (entry.get('response') or {}).get('content') or {}
+    text = content.get('text')
+    if not text: return
+    if content.get('encoding') == 'base64':
+        text = base64.b64decode(text).decode('utf-8')
+    yield from _nodes_from_response(json.loads(text))
+
+def iter_gql_nodes(f, chunk_size=CHUNK_SIZE):
+    """
+    Yields post nodes from an open dump file, one at a time.
+    Raises json.JSONDecodeError on malformed input after yielding everything decoded before it.
+    """
+    reader = _Reader(f, chunk_size)
+    while True:
+        key = reader.find_array()
+        if key is None: return
+        while True:
+            has_item, item = reader.next_item()
+            if not has_item: break
+            if key == 'entries':
+                yield from _nodes_from_har_entry(item)
+            elif isinstance(item, dict) and isinstance(item.get('node'), dict) and item['node'].get('id'):
+                yield item['node']
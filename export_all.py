@@ -0,0 +1,63 @@
+import os
+import sys
+import shlex
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+# Add repo root (lib) to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from lib import exporters
+
+# --- MULTI-EXPORTER RUNNER ---
+# Runs the selected exporters side by side, each in its own process: AWeber mostly waits on the
+# network while Buffer parses dumps and downloads media, so they overlap well.
+
+def print_summary(summaries):
+    print("\n📋 Summary:")
+    for s in summaries:
+        details = ", ".join(f"{k}: {v}" for k, v in s.items() if k not in ("name", "ok", "seconds", "error"))
+        status = "✅" if s['ok'] else f"❌ {s.get('error')}"
+        print(f"   {s['name']:<8} {status}  {s['seconds']:.1f}s  {details}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several exporters in one go")
+    parser.add_argument('exporters', nargs='*', help=f"Which exporters to run (default: all of {', '.join(exporters.REGISTRY)})")
+    parser.add_argument('--list', action='store_true', help="List available exporters and exit")
+    parser.add_argument('--sequential', action='store_true', help="Run one after another in this process")
+    parser.add_argument('--full', action='store_true', help="Passed to every exporter")
+    parser.add_argument('--skip-unchanged', action='store_true', help="Passed to every exporter")
+    parser.add_argument('--report', action='store_true', help="Passed to every exporter")
+    for name in exporters.REGISTRY:
+        parser.add_argument(f'--{name}-args', default="", metavar="ARGS",
+                            help=f"Extra arguments for {name}, e.g. --{name}-args=\"--help\"")
+    args = parser.parse_args()
+
+    if args.list:
+        for exporter in exporters.REGISTRY.values():
+            print(f"{exporter.name:<8} {exporter.description}")
+        return
+
+    selected = args.exporters or list(exporters.REGISTRY)
+    unknown = [name for name in selected if name not in exporters.REGISTRY]
+    if unknown:
+        parser.error(f"unknown exporter(s): {', '.join(unknown)}")
+
+    common = [flag for flag, on in (("--full", args.full), ("--skip-unchanged", args.skip_unchanged),
+                                    ("--report", args.report)) if on]
+    argvs = {name: common + shlex.split(getattr(args, f"{name}_args")) for name in selected}
+
+    print(f"🚀 Running: {', '.join(selected)}{' (sequential)' if args.sequential else ''}")
+    if args.sequential or len(selected) == 1:
+        summaries = [exporters.run(name, argvs[name]) for name in selected]
+    else:
+        with ProcessPoolExecutor(max_workers=len(selected)) as pool:
+            futures = [pool.submit(exporters.run, name, argvs[name], True) for name in selected]
+            summaries = [f.result() for f in futures]
+
+    print_summary(summaries)
+    if not all(s['ok'] for s in summaries):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from requests.adapters import HTTPAdapter
+
+from lib import instrumentation
+
+# --- CONCURRENT, RATE-LIMIT AWARE API CLIENT ---
+
+class ApiFetcher:
+    """
+    Runs GET requests on a thread pool on top of an existing (OAuth2) session.
+    - HTTP 429 pauses *all* workers until Retry-After has passed, then retries.
+    - Token refresh is serialized so parallel workers never refresh the same token twice.
+    """
+    def __init__(self, session, concurrency=4, retries=5, backoff=1.0, refresh_margin=60):
+        self.session = session
+        self.retries = retries
+        self.backoff = backoff
+        self.refresh_margin = refresh_margin
+        self.stats = {"requests": 0, "retries": 0, "throttled": 0.0}
+
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="api")
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._paused_until = 0.0
+        self._started = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def submit(self, url, params=None):
+        """Schedules a GET and returns a Future resolving to the Response (or None on network failure)."""
+        return self._executor.submit(self.get, url, params)
+
+    def get(self, url, params=None):
+        for attempt in range(self.retries + 1):
+            self._wait_for_throttle()
+            self._ensure_fresh_token()
+            with self._lock:
+                self.stats["requests"] += 1
+            instrumentation.count("http_requests")
+            try:
+                resp = self.session.get(url, params=params)
+            except Exception as e:
+                print(f"⚠️ Request failed ({type(e).__name__}): {url}")
+                resp = None
+
+            retryable = resp is None or resp.status_code == 429 or resp.status_code >= 500
+            if not retryable or attempt == self.retries:
+                return resp
+
+            with self._lock:
+                self.stats["retries"] += 1
+            instrumentation.count("http_retries")
+            if resp is not None and resp.status_code == 429:
+                self._throttle(_retry_after(resp, self.backoff * (2 ** attempt)))
+            else:
+                time.sleep(self.backoff * (2 ** attempt))
+        return None
+
+    def stats_line(self):
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        s = self.stats
+        return (f"📊 {s['requests']} requests in {elapsed:.1f}s ({s['requests'] / elapsed:.1f} req/s), "
+                f"{s['retries']} retries, {s['throttled']:.1f}s throttled")
+
+    def _throttle(self, seconds):
+        with self._lock:
+            until = time.monotonic() + seconds
+            if until > self._paused_until:
+                self.stats["throttled"] += until - max(self._paused_until, time.monotonic())
+                self._paused_until = until
+        print(f"🐢 Rate limited, pausing for {seconds:.1f}s...")
+        instrumentation.count("http_throttled")
+
+    def _wait_for_throttle(self):
+        while True:
+            with self._lock:
+                delay = self._paused_until - time.monotonic()
+            if delay <= 0: return
+            time.sleep(delay)
+
+    def _ensure_fresh_token(self):
+        """Refreshes the token once, under a lock, before it expires mid-flight."""
+        if not self._needs_refresh(): return
+        with self._refresh_lock:
+            # Another worker may have refreshed while we were waiting for the lock
+            if not self._needs_refresh(): return
+            token = self.session.refresh_token(self.session.auto_refresh_url, **(self.session.auto_refresh_kwargs or {}))
+            if self.session.token_updater:
+                self.session.token_updater(token)
+
+    def _needs_refresh(self):
+        token = getattr(self.session, 'token', None) or {}
+        expires_at = token.get('expires_at')
+        if not expires_at or not getattr(self.session, 'auto_refresh_url', None): return False
+        return expires_at - time.time() < self.refresh_margin
+
+def _retry_after(resp, default):
+    value = resp.headers.get('Retry-After')
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return default
+
+def iter_collection(fetcher, url, params=None):
+    """
+    Yields pages of a paginated collection (next_collection_link).
+    The next page is already requested while the caller works on the current one.
+    """
+    future = fetcher.submit(url, params)
+    while future:
+        resp = future.result()
+        if resp is None or resp.status_code != 200: return
+        page = resp.json()
+        next_url = page.get('next_collection_link')
+        future = fetcher.submit(next_url) if next_url else None
+        yield page
@@ -0,0 +1,51 @@
+import os
+import json
+import tempfile
+from contextlib import contextmanager
+
+# --- ATOMIC FILE WRITES ---
+# Files are written to a temp file in the target's directory, fsync'ed and renamed over the target,
+# so a crash, Ctrl+C or full disk leaves either the old or the new version, never half a file.
+# (SQLite databases don't need this: their transactions are already atomic.)
+
+def fsync_dir(directory):
+    """Makes a rename in `directory` durable. Directories can't be opened on Windows, where this is a no-op."""
+    if os.name == 'nt': return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+# os.umask can only be read by setting it, so it's read once here rather than while other threads create files
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+def _target_mode(path):
+    """Mode the replacement should get: the existing file's, else the default for new files (0666 minus umask)."""
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+@contextmanager
+def atomic_write(path, mode='w', encoding='utf-8'):
+    """`with atomic_write(path) as f:` replaces `path` only if the block finishes without an exception."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+    try:
+        with os.fdopen(fd, mode, encoding=None if 'b' in mode else encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file as 0600, which os.replace would carry over to the target
+        os.chmod(tmp_path, _target_mode(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path): os.remove(tmp_path)
+        raise
+    fsync_dir(directory)
+
+def write_json(path, data, **kwargs):
+    with atomic_write(path) as f:
+        json.dump(data, f, ensure_ascii=False, **kwargs)
@@ -1,7 +1,13 @@
 import os
-import json
+import sqlite3
 from datetime import datetime
-from bs4 import BeautifulSoup
+
+from lib import instrumentation
+from lib.storage import open_store
+from lib.render_cache import write_export
+from lib.export_shards import write_sharded_export
+from lib.search_index import SearchIndex
+from lib.dedup import collapse_duplicates
 
 # --- PATH & DIRECTORY MANAGEMENT ---
 
@@ -13,58 +19,112 @@ def get_platform_paths(platform_name, base_data_dir):
     
     return {
         "base": platform_dir,
-        "db": os.path.join(platform_dir, f"{platform_name}_db.json"),
+        "db": os.path.join(platform_dir, f"{platform_name}_db.sqlite"),
         "export": os.path.join(platform_dir, f"{platform_name}_export_llm.md"),
-        "media": media_dir
+        "export_manifest": os.path.join(platform_dir, f"{platform_name}_export_manifest.json"),
+        # Shared by all platforms
+        "search_index": os.path.join(os.path.dirname(platform_dir), "search_index.sqlite"),
+        "dedup_index": os.path.join(os.path.dirname(platform_dir), "dedup_index.sqlite"),
+        "render_cache": os.path.join(platform_dir, f"{platform_name}_render_cache.sqlite"),
+        "media": media_dir,
+        "image_cache": os.path.join(platform_dir, "image_cache"),
+        "metrics": os.path.join(platform_dir, f"{platform_name}_metrics.npz"),
+        "checkpoint": os.path.join(platform_dir, f"{platform_name}_checkpoint.json"),
+        "ingest_ledger": os.path.join(platform_dir, f"{platform_name}_ingest_ledger.json"),
+        "merge_report": os.path.join(platform_dir, f"{platform_name}_merge_report.json"),
+        "run_report": os.path.join(platform_dir, f"{platform_name}_run_report.json"),
+        "profile": os.path.join(platform_dir, f"{platform_name}_profile.pstats")
     }
 
 # --- DB PERSISTENCE ---
 
-def load_db(db_path, message_class):
-    """Loads JSON and returns metadata along with a dictionary of objects of the given class."""
-    if not os.path.exists(db_path):
-        return "1970-01-01T00:00:00Z", "Unknown", {}
-
-    with open(db_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    last_sync = data.get("last_sync", "1970-01-01T00:00:00Z")
-    list_name = data.get("list_name", "Unknown")
+def load_db(db_path, message_class, lazy=False):
+    """
+    Loads the DB and returns metadata along with a dictionary of objects of the given class.
+    With lazy, only the index (all fields but the content) is read; each message's content is read
+    from the DB the first time it is accessed, so memory doesn't grow with the size of the bodies.
+    """
+    store = open_store(db_path)
+    if not lazy:
+        last_sync, list_name, raw_messages = store.load()
+        messages = {mid: message_class.from_dict(m) for mid, m in raw_messages.items()}
+        return last_sync, list_name, messages
 
-    messages = {mid: message_class.from_dict(m) for mid, m in data.get("messages", {}).items()}
-    
+    last_sync, list_name, index, load_body = store.load_index()
+    messages = {mid: message_class.from_dict(data) if content_hash is None
+                else message_class.from_index(data, load_body, content_hash)
+                for mid, (data, content_hash) in index.items()}
     return last_sync, list_name, messages
 
-def save_all(message_objects_dict, paths, last_sync, list_name, title="Archive"):
-    """Saves the JSON database and generates Markdown in one step."""
-    
-    # 1. Save JSON (Serialize objects)
-    db_data = {
-        "last_sync": last_sync,
-        "list_name": list_name,
-        "messages": {mid: m.to_dict() for mid, m in message_objects_dict.items()}
-    }
-    
-    with open(paths['db'], 'w', encoding='utf-8') as f:
-        json.dump(db_data, f, indent=2, ensure_ascii=False)
+def backup_db(db_path):
+    """Copies the DB to {db}.bak, e.g. right before a --full rebuild replaces its contents."""
+    if open_store(db_path).backup(f"{db_path}.bak"):
+        print(f"🗄️  Previous DB backed up to {os.path.basename(db_path)}.bak")
+
+def save_all(message_objects_dict, paths, last_sync, list_name, title="Archive", skip_unchanged_export=False,
+             shard_tokens=None, shard_bytes=None, dedup=False, summary=None, backup=False):
+    """
+    Saves the database and generates Markdown in one step. Returns the number of changed DB records.
+    With shard_tokens / shard_bytes the export is split into budgeted shards instead of one file.
+    With dedup, later near-duplicates of messages (from any platform) are collapsed in the export.
+    `summary` is a Markdown section placed before the messages (e.g. engagement metrics).
+    With backup, the previous DB is copied to *.bak before it is overwritten (--full rebuilds).
+    Every file is replaced atomically and the DB is written in one transaction, so an interrupted
+    save leaves the previous version in place.
+    """
     
-    # 2. Save Markdown (Rendering)
-    sorted_msgs = sorted(message_objects_dict.values(), key=lambda x: x.date, reverse=True)
+    # 1. Save DB (Serialize objects, only changed rows are written; unread lazy bodies stay where they are)
+    with instrumentation.span("save.db"):
+        if backup: backup_db(paths['db'])
+        records = {mid: m.to_record() for mid, m in message_objects_dict.items()}
+        changed, removed = open_store(paths['db']).save_records(last_sync, list_name, records)
+        del records
+    written = len(changed) + len(removed)
+    instrumentation.count("db_rows_written", written)
+    print(f"💾 DB updated: {written} changed record(s).")
+
+    # 2. Keep the cross-platform search index in sync (changed messages and any the index is missing)
+    platform = os.path.basename(paths['base'])
+    with instrumentation.span("save.search_index"):
+        try:
+            index = SearchIndex(paths['search_index'])
+            stale = set(changed) | (message_objects_dict.keys() - index.ids(platform))
+            raw_messages = {mid: message_objects_dict[mid].to_dict() for mid in stale}
+            indexed = index.update(platform, raw_messages, all_ids=message_objects_dict)
+            print(f"🔎 Search index updated: {indexed} document(s).")
+        except sqlite3.OperationalError as e:
+            hint = " (SQLite without FTS5?)" if "no such module: fts5" in str(e) else ""
+            print(f"⚠️ Search index not updated{hint}: {e}. Run search/search.py --reindex to catch up.")
     
-    print(f"📄 Writing {len(sorted_msgs)} items to {paths['export']}...")
-    with open(paths['export'], 'w', encoding='utf-8') as f:
-        f.write(f"# {title}: {list_name}\n")
-        f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-        
-        for i, msg in enumerate(sorted_msgs, 1):
-            f.write(msg.to_markdown(i, media_base_path=paths.get('media')))
+    # 3. Find near-duplicates across platforms (the DB keeps every message in full)
+    collapsed = None
+    if dedup:
+        with instrumentation.span("save.dedup"):
+            collapsed = collapse_duplicates(paths, message_objects_dict, changed)
+
+    # 4. Save Markdown (Incremental rendering from the fragment cache)
+    generated = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    with instrumentation.span("save.export"):
+        if shard_tokens or shard_bytes:
+            write_sharded_export(
+                message_objects_dict, paths, list_name, title, generated,
+                max_tokens=shard_tokens, max_bytes=shard_bytes, overrides=collapsed, summary=summary
+            )
+        else:
+            write_export(
+                message_objects_dict, paths, list_name, title, generated,
+                skip_unchanged=skip_unchanged_export, overrides=collapsed, summary=summary
+            )
                 
-    print(f"✅ Persistence complete (JSON + MD).")
+    print(f"✅ Persistence complete (DB + MD).")
+    return written
 
 # --- HTML PROCESSING ---
 
 def clean_html_content(html_content):
     if not html_content: return {"preview": "", "body": ""}
+    # Imported here: bs4 takes a while to load and only the AWeber exporter needs it
+    from bs4 import BeautifulSoup
     soup = BeautifulSoup(html_content, 'html.parser')
     preview_text = ""
     meta_pre = soup.find('meta', attrs={'name': 'x-preheader'})
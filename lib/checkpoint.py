@@ -0,0 +1,44 @@
+import os
+import json
+import time
+from datetime import datetime
+
+from lib.atomic_io import write_json
+
+# --- SYNC CHECKPOINTS ---
+# A long API sync periodically records how far it got (per-status pagination cursor + messages fetched
+# so far) in {platform}_checkpoint.json. If the run dies, `--resume` continues from there instead of
+# starting over. The file is written atomically and removed once save_all has persisted the run.
+
+CHECKPOINT_INTERVAL = 30.0  # seconds between periodic checkpoints
+
+class Checkpoint:
+    def __init__(self, path, interval=CHECKPOINT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self._last_saved = time.monotonic()
+
+    def load(self):
+        """The saved state dict, or None if there is no (readable) checkpoint."""
+        if not os.path.exists(self.path): return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError):
+            print(f"⚠️ Checkpoint {os.path.basename(self.path)} unreadable, ignoring it.")
+            return None
+
+    def due(self):
+        """True once `interval` seconds passed since the last write; check it before building a large state."""
+        return time.monotonic() - self._last_saved >= self.interval
+
+    def save(self, state, force=False):
+        """Writes `state` if it is due (or with force). Returns True if written."""
+        if not force and not self.due(): return False
+        state = dict(state, saved=datetime.now().isoformat(timespec='seconds'))
+        write_json(self.path, state)
+        self._last_saved = time.monotonic()
+        return True
+
+    def clear(self):
+        if os.path.exists(self.path): os.remove(self.path)
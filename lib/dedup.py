@@ -0,0 +1,279 @@
+import os
+import sqlite3
+
+from lib import instrumentation
+from lib.storage import digest
+from lib.search_index import BUSY_TIMEOUT
+from lib.render_cache import INDEX_TOKEN
+
+# --- CROSS-PLATFORM NEAR-DUPLICATE DETECTION ---
+# LinkedIn posts get recycled into newsletters and back. Every message gets a MinHash signature over
+# its word 3-grams (computed in NumPy batches, cached by content hash), and locality-sensitive hashing
+# over signature bands finds candidate pairs without comparing every pair of messages.
+# All platforms share one index (data/dedup_index.sqlite), so duplicates are found across exports.
+# Within a cluster the oldest message is the original; later copies are collapsed to a short note.
+
+# Bump when the signature computation changes, so cached signatures are recomputed
+SIGNATURE_VERSION = 1
+NUM_PERM = 64
+BANDS = 16                # 16 bands x 4 rows: pairs above ~0.5 similarity almost always become candidates
+SHINGLE_WORDS = 3
+THRESHOLD = 0.6           # estimated Jaccard similarity needed to call two texts duplicates
+MIN_SHINGLES = 8          # very short texts ("Happy new year!") are never treated as duplicates
+CHUNK_CHARS = 2_000_000   # characters tokenized and hashed per NumPy batch
+
+def _import_numpy():
+    try:
+        import numpy
+        return numpy
+    except ImportError:
+        print("⚠️ NumPy not installed. Skipping duplicate detection. (pip install numpy)")
+        return None
+
+def _byte_tables(np):
+    """Word-byte classes (ASCII letters, digits, _, UTF-8 multi-byte chars) and a tabulation hash table."""
+    word = np.zeros(256, dtype=bool)
+    for ch in "0123456789_abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ":
+        word[ord(ch)] = True
+    word[0x80:] = True
+    table = np.random.RandomState(3).randint(0, 2 ** 63, size=64 * 256, dtype=np.uint64)
+    return word, table
+
+def _shingles(np, texts):
+    """
+    Word 3-gram hashes of `texts` as one flat uint64 array plus the number of 3-grams per text.
+    Tokenizing and hashing run on the UTF-8 bytes of the whole batch at once instead of per word:
+    a word is a run of word bytes, hashed by XOR-ing a random table entry per (position, byte).
+    """
+    word_bytes, table = _byte_tables(np)
+    blob = "\x00".join(t.replace("\x00", " ") for t in texts).lower().encode('utf-8')
+    buf = np.frombuffer(blob, dtype=np.uint8)
+    is_word = word_bytes[buf]
+
+    # Typographic punctuation (dashes, curly quotes, ellipsis, nbsp, «») and emoji separate words too
+    nxt = np.append(buf[1:], 0)
+    for lead, length, mask in ((0xE2, 3, (nxt == 0x80) | (nxt == 0x81)), (0xC2, 2, nxt >= 0xA0),
+                               (0xF0, 4, np.ones(len(buf), dtype=bool))):
+        hits = np.flatnonzero((buf == lead) & mask)
+        for k in range(length):
+            is_word[np.minimum(hits + k, len(buf) - 1)] = False
+
+    edges = np.diff(np.concatenate(([False], is_word, [False])).astype(np.int8))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    counts = np.zeros(len(texts), dtype=np.int64)
+    if not len(starts):
+        return np.zeros(0, dtype=np.uint64), counts
+
+    lengths = ends - starts
+    first_byte = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    positions = np.flatnonzero(is_word)
+    offsets = positions - np.repeat(starts, lengths)
+    words = np.bitwise_xor.reduceat(table[((offsets & 63) << 8) | buf[positions]], first_byte)
+
+    # Which text each word belongs to: count the separators before it
+    text_of_word = np.searchsorted(np.flatnonzero(buf == 0), starts)
+    per_text = np.bincount(text_of_word, minlength=len(texts))
+    counts = np.maximum(per_text - SHINGLE_WORDS + 1, 0)
+    if not counts.sum():
+        return np.zeros(0, dtype=np.uint64), counts
+
+    # Start of every 3-gram that lies entirely inside one text
+    text_starts = np.concatenate(([0], np.cumsum(per_text)[:-1]))
+    first_ngram = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    at = np.repeat(text_starts, counts) + (np.arange(counts.sum()) - np.repeat(first_ngram, counts))
+    hashed = words[at]
+    for shift in range(1, SHINGLE_WORDS):
+        hashed = hashed * np.uint64(1000003) + words[at + shift]
+    return hashed & np.uint64(0xffffffff), counts
+
+def _densify(np, signatures, empty):
+    """Fills empty bins from the next non-empty bin to the right (circularly), offset by the distance."""
+    filled = signatures.copy()
+    todo = empty.copy()
+    distance = 1
+    while todo.any():
+        source = np.roll(signatures, -distance, axis=1)
+        usable = todo & ~np.roll(empty, -distance, axis=1)
+        filled[usable] = source[usable] + np.uint32(distance * 0x9E3779B1 % 2 ** 32)
+        todo &= ~usable
+        distance += 1
+    return filled
+
+def minhash_signatures(np, texts, seed=1):
+    """
+    Returns (signatures, valid): (len(texts), NUM_PERM) uint32 MinHash signatures, and a mask
+    that is False for texts with fewer than MIN_SHINGLES 3-grams.
+
+    One permutation hashing: each 3-gram is hashed once (multiply-shift), the top bits pick one of
+    NUM_PERM bins and the signature keeps the minimum per bin. Empty bins are densified by rotation,
+    so two signatures still agree in a bin with probability equal to the Jaccard similarity.
+    That is NUM_PERM times less hashing than NUM_PERM independent hash functions.
+    """
+    rng = np.random.RandomState(seed)
+    a = rng.randint(0, 2 ** 63, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.randint(0, 2 ** 63, dtype=np.uint64)
+    bin_bits = np.uint64(64 - int(NUM_PERM).bit_length() + 1)
+
+    signatures = np.full(len(texts) * NUM_PERM, 0xffffffff, dtype=np.uint32)
+    counts = np.zeros(len(texts), dtype=np.int64)
+    i = 0
+    while i < len(texts):
+        # Batches of about CHUNK_CHARS characters keep the temporary arrays small
+        j, size = i, 0
+        while j < len(texts) and (j == i or size + len(texts[j]) <= CHUNK_CHARS):
+            size += len(texts[j])
+            j += 1
+        shingles, counts[i:j] = _shingles(np, texts[i:j])
+        hashed = a * shingles + b
+        cells = np.repeat(np.arange(i, j, dtype=np.int64) * NUM_PERM, counts[i:j]) + (hashed >> bin_bits).astype(np.int64)
+        np.minimum.at(signatures, cells, ((hashed >> np.uint64(16)) & np.uint64(0xffffffff)).astype(np.uint32))
+        i = j
+
+    signatures = signatures.reshape(len(texts), NUM_PERM)
+    valid = counts >= MIN_SHINGLES
+    signatures[valid] = _densify(np, signatures[valid], signatures[valid] == 0xffffffff)
+    return signatures, valid
+
+def find_clusters(np, signatures):
+    """Groups rows of `signatures` into near-duplicate clusters (lists of row indices, size >= 2)."""
+    n = len(signatures)
+    parent = list(range(n))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    rows = NUM_PERM // BANDS
+    mixers = np.random.RandomState(7).randint(1, 2 ** 62, size=rows, dtype=np.uint64)
+    for band in range(BANDS):
+        block = signatures[:, band * rows:(band + 1) * rows].astype(np.uint64)
+        band_keys = (block * mixers).sum(axis=1)  # wraps around; collisions are filtered by the check below
+        order = np.argsort(band_keys, kind='stable')
+        sorted_keys = band_keys[order]
+        # Compare every member of a bucket with the bucket's first member (its leader)
+        new_bucket = np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1]))
+        leaders = order[np.flatnonzero(new_bucket)[np.cumsum(new_bucket) - 1]]
+        candidates = np.flatnonzero(~new_bucket)
+        members, leaders = order[candidates], leaders[candidates]
+        similarity = (signatures[members] == signatures[leaders]).mean(axis=1)
+        for member, leader in zip(members[similarity >= THRESHOLD].tolist(), leaders[similarity >= THRESHOLD].tolist()):
+            parent[find(member)] = find(leader)
+
+    clusters = {}
+    for i in range(n):
+        clusters.setdefault(find(i), []).append(i)
+    return [members for members in clusters.values() if len(members) > 1]
+
+class DuplicateIndex:
+    """Signatures cached by content hash plus which message of which platform has which content."""
+    def __init__(self, path):
+        self.path = path
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS signatures (hash TEXT PRIMARY KEY, sig BLOB)")
+        conn.execute("""CREATE TABLE IF NOT EXISTS docs (
+            platform TEXT, id TEXT, date TEXT, source TEXT, title TEXT, hash TEXT, PRIMARY KEY (platform, id))""")
+        return conn
+
+    def update(self, np, platform, messages, all_ids=None):
+        """
+        Replaces the docs of `platform` with raw message dicts {id: data}. With `all_ids`, `messages` may be
+        just the changed subset: other docs in `all_ids` are kept. Returns the number of new signatures.
+        """
+        docs = []
+        for mid, data in messages.items():
+            text = data.get('content') or ""
+            title = data.get('subject') or " ".join(text.split())[:60]
+            docs.append((platform, mid, data.get('date'), data.get('source'), title,
+                         digest(f"{SIGNATURE_VERSION}|{NUM_PERM}|{SHINGLE_WORDS}|{text}")))
+
+        conn = self._connect()
+        try:
+            with conn:
+                known = {h for (h,) in conn.execute("SELECT hash FROM signatures")}
+                missing = {}
+                for doc in docs:
+                    if doc[5] not in known: missing[doc[5]] = messages[doc[1]].get('content') or ""
+                if missing:
+                    signatures, valid = minhash_signatures(np, list(missing.values()))
+                    conn.executemany("INSERT OR REPLACE INTO signatures (hash, sig) VALUES (?, ?)", [
+                        (h, signatures[i].tobytes() if valid[i] else None) for i, h in enumerate(missing)])
+                if all_ids is None:
+                    conn.execute("DELETE FROM docs WHERE platform = ?", (platform,))
+                else:
+                    conn.executemany("DELETE FROM docs WHERE platform = ? AND id = ?", [
+                        (platform, mid) for (mid,) in conn.execute("SELECT id FROM docs WHERE platform = ?", (platform,))
+                        if mid not in all_ids])
+                conn.executemany("INSERT OR REPLACE INTO docs VALUES (?, ?, ?, ?, ?, ?)", docs)
+                conn.execute("DELETE FROM signatures WHERE hash NOT IN (SELECT hash FROM docs)")
+        finally:
+            conn.close()
+        return len(missing)
+
+    def ids(self, platform):
+        conn = self._connect()
+        try:
+            return {mid for (mid,) in conn.execute("SELECT id FROM docs WHERE platform = ?", (platform,))}
+        finally:
+            conn.close()
+
+    def clusters(self, np):
+        """Near-duplicate clusters across all platforms, each a list of doc dicts sorted oldest first."""
+        conn = self._connect()
+        try:
+            rows = conn.execute("""SELECT d.platform, d.id, d.date, d.source, d.title, s.sig FROM docs d
+                JOIN signatures s ON s.hash = d.hash WHERE s.sig IS NOT NULL""").fetchall()
+        finally:
+            conn.close()
+        if not rows: return []
+
+        signatures = np.frombuffer(b"".join(r[5] for r in rows), dtype=np.uint32).reshape(len(rows), NUM_PERM)
+        keys = ("platform", "id", "date", "source", "title")
+        return [sorted((dict(zip(keys, rows[i][:5])) for i in members), key=lambda d: (d['date'] or "", d['platform'], d['id']))
+                for members in find_clusters(np, signatures)]
+
+def _collapsed_markdown(msg, original):
+    lines = [
+        "---",
+        f"## {INDEX_TOKEN}. {msg.subject or f'Post {msg.date}'}",
+        f"- **Date:** {msg.date}",
+        f"- **Status:** {msg.status.upper()}",
+    ]
+    if msg.source:
+        lines.append(f"- **Source:** {msg.source}" + (f" ({msg.subchannel})" if msg.subchannel else ""))
+    lines.append(f"\n*Near-duplicate of the {original['platform']} message “{original['title']}” "
+                 f"from {original['date']} (text omitted).*\n")
+    return "\n".join(lines) + "\n"
+
+def collapse_duplicates(paths, messages, changed):
+    """
+    Updates the shared index with this platform's messages (re-reading only the `changed` ids and the
+    ones the index is missing) and returns {id: fragment} replacing the export fragments of messages
+    that are later copies of an earlier one (on any platform).
+    """
+    np = _import_numpy()
+    if np is None: return {}
+
+    platform = os.path.basename(paths['base'])
+    index = DuplicateIndex(paths['dedup_index'])
+    stale = set(changed) | (messages.keys() - index.ids(platform))
+    computed = index.update(np, platform, {mid: messages[mid].to_dict() for mid in stale}, all_ids=messages)
+    clusters = index.clusters(np)
+
+    collapsed = {}
+    for cluster in clusters:
+        original = cluster[0]
+        for doc in cluster[1:]:
+            if doc['platform'] == platform and doc['id'] in messages:
+                collapsed[doc['id']] = _collapsed_markdown(messages[doc['id']], original)
+
+    cross = sum(1 for c in clusters if len({d['platform'] for d in c}) > 1)
+    print(f"🪞 Duplicates: {len(clusters)} cluster(s) ({cross} cross-platform), {len(collapsed)} message(s) "
+          f"collapsed in this export, {computed} new signature(s).")
+    instrumentation.count("dedup_signatures_computed", computed)
+    instrumentation.count("dedup_collapsed", len(collapsed))
+    return collapsed
@@ -0,0 +1,123 @@
+import os
+import json
+import hashlib
+
+from lib import instrumentation
+from lib.atomic_io import atomic_write, write_json
+from lib.render_cache import INDEX_TOKEN, RenderCache, cached_fragments
+
+# --- SHARDED LLM EXPORT ---
+# Big archives don't fit into one LLM context window / upload. The export is split into numbered
+# shards capped by an approximate token count and/or byte size. Messages are never split.
+#
+# Shards run oldest -> newest and are numbered from the oldest message, so an incremental sync
+# (which only adds recent messages) changes the newest shard only. Shards whose body did not
+# change are left untouched on disk.
+
+# Rough average for English prose / Markdown with common LLM tokenizers
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text):
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+def shard_path(export_path, number):
+    return export_path.replace(".md", f".part{number:03d}.md")
+
+def _header(title, list_name, number):
+    return f"# {title}: {list_name} (part {number})\n"
+
+def _head(title, list_name, number, generated, summary):
+    """Everything before a shard's first message. The summary section only goes into part 1."""
+    return f"{_header(title, list_name, number)}Generated: {generated}\n\n" + (summary if number == 1 else "")
+
+def _load_manifest(path):
+    if not os.path.exists(path): return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return {}
+
+def write_sharded_export(messages, paths, list_name, title, generated, max_tokens=None, max_bytes=None,
+                         overrides=None, summary=None):
+    """
+    Writes the export as `{platform}_export_llm.partNNN.md` shards plus a manifest mapping
+    each message id to its shard, byte offset and length. A message larger than the budget
+    gets a shard of its own. `summary` is placed at the top of the first shard.
+    Returns the number of shards (re)written.
+    """
+    cache = RenderCache(paths['render_cache'])
+    fragments = cached_fragments(cache, messages, paths, overrides)
+    order = sorted(messages.items(), key=lambda kv: kv[1].date)
+
+    summary = summary or ""
+    previous = _load_manifest(paths['export_manifest'])
+    previous_hashes = {s['file']: s['sha1'] for s in previous.get('shards', [])}
+    manifest = {"title": title, "list_name": list_name, "generated": generated,
+                "max_tokens": max_tokens, "max_bytes": max_bytes, "shards": [], "messages": {}}
+    written = 0
+
+    def flush(number, items):
+        nonlocal written
+        path = shard_path(paths['export'], number)
+        name = os.path.basename(path)
+        # `Generated:` has a fixed width, so offsets stay valid for shards that are not rewritten
+        head = _head(title, list_name, number, generated, summary)
+
+        body_hash = hashlib.sha1((_header(title, list_name, number) + (summary if number == 1 else "")).encode('utf-8'))
+        offset = len(head.encode('utf-8'))
+        for mid, text, size in items:
+            body_hash.update(mid.encode('utf-8') + b"\x00")
+            body_hash.update(text.encode('utf-8'))
+            manifest["messages"][mid] = {"shard": name, "offset": offset, "length": size}
+            offset += size
+        body_hash = body_hash.hexdigest()
+
+        if previous_hashes.get(name) != body_hash or not os.path.exists(path):
+            with atomic_write(path) as f:
+                f.write(head)
+                for _, text, _ in items:
+                    f.write(text)
+            written += 1
+
+        manifest["shards"].append({
+            "file": name, "messages": len(items), "bytes": offset,
+            "tokens": estimate_tokens(head) + sum(estimate_tokens(text) for _, text, _ in items),
+            "first_date": messages[items[0][0]].date, "last_date": messages[items[-1][0]].date,
+            "sha1": body_hash,
+        })
+
+    def budget_used(number):
+        """Bytes and tokens taken by the shard head before any message is added."""
+        head = _head(title, list_name, number, generated, summary)
+        return len(head.encode('utf-8')), estimate_tokens(head)
+
+    items, (used_bytes, used_tokens) = [], budget_used(1)
+    for i, (mid, _) in enumerate(order, 1):
+        text = fragments[mid].replace(INDEX_TOKEN, str(i))
+        size = len(text.encode('utf-8'))
+        tokens = estimate_tokens(text)
+        over = (max_bytes and used_bytes + size > max_bytes) or (max_tokens and used_tokens + tokens > max_tokens)
+        if items and over:
+            flush(len(manifest["shards"]) + 1, items)
+            items, (used_bytes, used_tokens) = [], budget_used(len(manifest["shards"]) + 1)
+        items.append((mid, text, size))
+        used_bytes += size
+        used_tokens += tokens
+    if items:
+        flush(len(manifest["shards"]) + 1, items)
+
+    # The archive may have shrunk (e.g. drafts removed)
+    current = {s['file'] for s in manifest["shards"]}
+    for old in previous_hashes:
+        stale = os.path.join(os.path.dirname(paths['export']), old)
+        if old not in current and os.path.exists(stale):
+            os.remove(stale)
+
+    write_json(paths['export_manifest'], manifest)
+
+    print(f"📚 Export: {len(manifest['shards'])} shard(s) of {len(order)} items, {written} rewritten "
+          f"(manifest: {os.path.basename(paths['export_manifest'])}).")
+    instrumentation.count("messages_exported", len(order))
+    instrumentation.count("shards_written", written)
+    return written
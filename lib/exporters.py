@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+import importlib
+import traceback
+from collections import namedtuple
+
+# --- EXPORTER REGISTRY ---
+# Exporters are registered as metadata only. Their module (and its heavy dependencies) is imported
+# in the process that runs it, so listing exporters or printing --help stays instant.
+# An exporter module exposes main(argv) -> summary dict, the same function its CLI uses.
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+Exporter = namedtuple("Exporter", "name directory module description")
+
+REGISTRY = {}
+
+def register(name, directory, module, description=""):
+    """`directory` is relative to the repository root and holds `module`.py."""
+    REGISTRY[name] = Exporter(name, directory, module, description)
+
+register("aweber", "aweber", "aweber_dumper", "AWeber newsletters via the OAuth2 API (network-bound)")
+register("buffer", "buffer", "buffer_dumper", "LinkedIn posts from Buffer GraphQL dumps (parsing + media I/O)")
+
+def load(name):
+    exporter = REGISTRY[name]
+    path = os.path.join(ROOT_DIR, exporter.directory)
+    if path not in sys.path: sys.path.insert(0, path)
+    return importlib.import_module(exporter.module)
+
+class _PrefixedStream:
+    """Prefixes every output line, so concurrent exporters stay readable in one terminal."""
+    def __init__(self, stream, prefix):
+        self.stream = stream
+        self.prefix = prefix
+        self._line_start = True
+
+    def write(self, text):
+        out = []
+        for line in text.splitlines(keepends=True):
+            if self._line_start: out.append(self.prefix)
+            out.append(line)
+            self._line_start = line.endswith("\n")
+        self.stream.write("".join(out))
+        if "\n" in text: self.stream.flush()
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+def run(name, argv, prefix_output=False):
+    """
+    Runs one exporter's main(argv). Never raises: failures are reported in the summary
+    as {"name", "ok", "seconds", "error"} next to whatever main() returned.
+    """
+    if prefix_output:
+        width = max(len(n) for n in REGISTRY)
+        sys.stdout = _PrefixedStream(sys.stdout, f"[{name:<{width}}] ")
+        sys.stderr = _PrefixedStream(sys.stderr, f"[{name:<{width}}] ")
+
+    started = time.perf_counter()
+    summary = {"name": name, "ok": True}
+    try:
+        result = load(name).main(argv)
+        if isinstance(result, dict): summary.update(result)
+    except SystemExit as e:
+        # argparse errors / early exits inside an exporter
+        summary.update(ok=not e.code, error=f"exit code {e.code}" if e.code else None)
+    except Exception as e:
+        traceback.print_exc()
+        summary.update(ok=False, error=f"{type(e).__name__}: {e}")
+    except KeyboardInterrupt:
+        summary.update(ok=False, error="interrupted")
+    summary["seconds"] = round(time.perf_counter() - started, 2)
+    if prefix_output: sys.stdout.flush()
+    return summary
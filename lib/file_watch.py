@@ -0,0 +1,90 @@
+import os
+import glob
+import time
+import queue
+import fnmatch
+import threading
+
+# --- FILE WATCHER ---
+# Used by --watch modes: reports new/modified files matching glob patterns.
+# watchdog (inotify / FSEvents / ReadDirectoryChangesW) is used when installed, polling otherwise.
+
+def _matches(path, patterns):
+    return any(fnmatch.fnmatch(os.path.abspath(path), os.path.abspath(p)) for p in patterns)
+
+def _start_watchdog(patterns, events):
+    try:
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+    except ImportError:
+        print("ℹ️ watchdog not installed, polling for changes instead. (pip install watchdog)")
+        return None
+
+    class Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if event.is_directory: return
+            for path in (event.src_path, getattr(event, 'dest_path', None)):
+                if path and _matches(path, patterns): events.put(os.path.abspath(path))
+
+    observer = Observer()
+    for directory in {os.path.dirname(p) for p in patterns}:
+        observer.schedule(Handler(), directory, recursive=False)
+    observer.start()
+
+    def stop():
+        observer.stop()
+        observer.join()
+    return stop
+
+def _start_polling(patterns, events, interval):
+    def snapshot():
+        stamps = {}
+        for pattern in patterns:
+            for path in glob.glob(pattern):
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                stamps[os.path.abspath(path)] = (st.st_size, st.st_mtime_ns)
+        return stamps
+
+    stopped = threading.Event()
+    def poll():
+        seen = snapshot()
+        while not stopped.wait(interval):
+            current = snapshot()
+            for path in current.keys() | seen.keys():
+                if current.get(path) != seen.get(path): events.put(path)
+            seen = current
+
+    threading.Thread(target=poll, daemon=True, name="file-poll").start()
+    return stopped.set
+
+def watch_files(patterns, debounce=1.0, poll_interval=1.0):
+    """
+    Yields sorted lists of paths matching `patterns` that were created, modified or deleted.
+    Changes are batched until nothing happened for `debounce` seconds, so a file that is still
+    being written (e.g. a large DevTools response) is reported once. Runs until interrupted.
+    """
+    for directory in {os.path.dirname(p) for p in patterns}:
+        os.makedirs(directory, exist_ok=True)
+
+    events = queue.Queue()
+    stop = _start_watchdog(patterns, events) or _start_polling(patterns, events, poll_interval)
+    try:
+        while True:
+            try:
+                # Short timeout keeps Ctrl+C responsive (a plain get() can't be interrupted on Windows)
+                changed = {events.get(timeout=0.5)}
+            except queue.Empty:
+                continue
+            quiet_since = time.monotonic()
+            while time.monotonic() - quiet_since < debounce:
+                try:
+                    changed.add(events.get(timeout=debounce))
+                    quiet_since = time.monotonic()
+                except queue.Empty:
+                    break
+            yield sorted(changed)
+    finally:
+        stop()
@@ -0,0 +1,168 @@
+import os
+import re
+from html.parser import HTMLParser
+from concurrent.futures import ProcessPoolExecutor
+
+from bs4.builder import HTMLTreeBuilder
+from bs4.dammit import EntitySubstitution
+
+from lib import instrumentation
+from lib.base_utils import clean_html_content
+
+# --- FAST HTML -> TEXT CLEANING ---
+# Produces exactly what clean_html_content() (BeautifulSoup + html.parser) returns, but runs on the
+# same stdlib tokenizer without building a tree: it only tracks which tags are open, mirroring bs4's
+# rules for merging text, closing void elements and skipping <script>/<style>/<template>/<rt>/<rp> text.
+# lxml/html5lib are not used on purpose: their tree construction changes the text for messy
+# newsletter HTML, and the output has to stay byte-identical with the archive built so far.
+
+_VOID_TAGS = frozenset(HTMLTreeBuilder.DEFAULT_EMPTY_ELEMENT_TAGS)
+_SKIPPED_TEXT_TAGS = frozenset(HTMLTreeBuilder.DEFAULT_STRING_CONTAINERS)
+_ENTITIES = EntitySubstitution.HTML_ENTITY_TO_CHARACTER
+_SEPARATOR = '\n\n'
+_DECIMAL_REFERENCE_RE = re.compile(r'^([0-9]+)(.*)')
+_HEX_REFERENCE_RE = re.compile(r'^([0-9a-f]+)(.*)')
+
+def _numeric_reference(name):
+    """
+    Resolves html.parser's numeric character reference `name` the way bs4 does (the HTML spec's rules):
+    returns (character, trailing text that was not part of the number).
+    """
+    base, pattern = 10, _DECIMAL_REFERENCE_RE
+    if name[:1] in ('x', 'X'):
+        name, base, pattern = name[1:], 16, _HEX_REFERENCE_RE
+    try:
+        number, extra = int(name, base), ""
+    except ValueError:
+        # An unterminated reference followed by text: only the leading digits are the number
+        match = pattern.search(name)
+        if match is None: return "", name
+        number, extra = int(match.group(1), base), match.group(2)
+
+    if number == 0 or number > 0x10ffff or 0xd800 <= number <= 0xdfff: return "\ufffd", extra
+    if 0x80 <= number <= 0x9f:
+        # References to Windows-1252 bytes (&#147; for a curly quote) mean that character
+        try:
+            return bytes([number]).decode('cp1252'), extra
+        except UnicodeDecodeError:
+            pass
+    return chr(number), extra
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.strings = []
+        self.preview = None
+        self._data = []
+        self._open = []            # open tag names, like bs4's tagStack
+        self._skipping = 0         # how many of the open tags hide their text
+        self._closed_voids = []    # void tags whose explicit </tag> must be ignored
+
+    def _flush(self, keep=True):
+        if not self._data: return
+        text = "".join(self._data)
+        self._data = []
+        if keep and not self._skipping:
+            text = text.strip()
+            if text: self.strings.append(text)
+
+    def _push(self, tag):
+        self._open.append(tag)
+        if tag in _SKIPPED_TEXT_TAGS: self._skipping += 1
+
+    def _pop_to(self, tag):
+        if tag not in self._open: return
+        while self._open:
+            popped = self._open.pop()
+            if popped in _SKIPPED_TEXT_TAGS: self._skipping -= 1
+            if popped == tag: return
+
+    def handle_starttag(self, tag, attrs, is_void_candidate=True):
+        self._flush()
+        if tag == 'meta' and self.preview is None:
+            attr_dict = {k: (v if v is not None else "") for k, v in attrs}
+            if attr_dict.get('name') == 'x-preheader':
+                self.preview = attr_dict.get('content') or ""
+        self._push(tag)
+        if is_void_candidate and tag in _VOID_TAGS:
+            self._flush()
+            self._pop_to(tag)
+            self._closed_voids.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, is_void_candidate=False)
+        self._flush()
+        self._pop_to(tag)
+
+    def handle_endtag(self, tag):
+        if tag in self._closed_voids:
+            # bs4 silently ignores </br> after <br>, so text on both sides stays one string
+            self._closed_voids.remove(tag)
+            return
+        self._flush()
+        self._pop_to(tag)
+
+    def handle_data(self, data):
+        self._data.append(data)
+
+    def handle_charref(self, name):
+        dereferenced, extra = _numeric_reference(name)
+        if dereferenced: self._data.append(dereferenced)
+        if extra: self._data.append(extra)
+
+    def handle_entityref(self, name):
+        self._data.append(_ENTITIES.get(name, f"&{name}"))
+
+    def _standalone(self, data, keep):
+        self._flush()
+        self._data.append(data)
+        self._flush(keep)
+
+    def handle_comment(self, data): self._standalone(data, keep=False)
+    def handle_decl(self, decl): self._standalone(decl, keep=False)
+    def handle_pi(self, data): self._standalone(data, keep=False)
+
+    def unknown_decl(self, data):
+        # CDATA sections count as text for get_text(), other declarations don't
+        if data.upper().startswith("CDATA["):
+            self._flush()
+            text = data[len("CDATA["):].strip()
+            if text: self.strings.append(text)
+        else:
+            self._standalone(data, keep=False)
+
+def clean_html_fast(html_content):
+    """Drop-in replacement for clean_html_content() without the BeautifulSoup tree."""
+    if not html_content: return {"preview": "", "body": ""}
+    parser = _TextExtractor()
+    try:
+        parser.feed(html_content)
+        parser.close()
+    except AssertionError:
+        # html.parser gave up on this markup; let BeautifulSoup report it the usual way
+        return clean_html_content(html_content)
+    parser._flush()
+    return {"preview": (parser.preview or "").strip(), "body": _SEPARATOR.join(parser.strings)}
+
+ENGINES = {"bs4": clean_html_content, "fast": clean_html_fast}
+
+def cleaning_pool(workers=None):
+    """Process pool for clean_html_batch(pool=...); workers only start once a large batch comes in."""
+    return ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+
+def clean_html_batch(html_bodies, engine="fast", workers=None, chunksize=16, pool=None):
+    """
+    Cleans many HTML bodies at once, in input order.
+    Large batches are spread over a process pool (workers=1 keeps everything in-process). Callers that
+    clean batch after batch (one per API page) pass a `pool` from cleaning_pool() to reuse its processes.
+    """
+    clean = ENGINES[engine]
+    html_bodies = list(html_bodies)
+    instrumentation.count("html_documents_cleaned", len(html_bodies))
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(html_bodies) < 2 * chunksize:
+        return [clean(body) for body in html_bodies]
+    if pool is not None:
+        return list(pool.map(clean, html_bodies, chunksize=chunksize))
+    with cleaning_pool(workers) as pool:
+        return list(pool.map(clean, html_bodies, chunksize=chunksize))
@@ -0,0 +1,123 @@
+import re
+import json
+import time
+import sqlite3
+import threading
+from urllib.parse import urlencode
+
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+
+from lib import instrumentation
+
+# --- PERSISTENT HTTP CACHE ---
+
+class CachedSession:
+    """
+    Wraps a requests/OAuth2 session with an on-disk (SQLite) cache for GET requests.
+    - Cache-Control: `no-store` is never cached, `max-age` marks a response fresh for that long.
+    - Stale entries are revalidated with If-None-Match / If-Modified-Since (304 -> cached body).
+    - `immutable(url, response)` lets the caller pin responses that never change (no network at all).
+    - Entries unused for `max_age` seconds are evicted, then least recently used ones until under `max_bytes`.
+    Every other attribute (token, refresh_token, mount, ...) is delegated to the wrapped session.
+    """
+    def __init__(self, session, path, default_ttl=0, max_age=90 * 24 * 3600, max_bytes=256 * 1024 * 1024,
+                 immutable=None):
+        self._session = session
+        self._default_ttl = default_ttl
+        self._max_age = max_age
+        self._max_bytes = max_bytes
+        self._immutable = immutable
+        self._lock = threading.Lock()
+        self.cache_stats = {"hits": 0, "revalidated": 0, "misses": 0}
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY, url TEXT, status INTEGER, headers TEXT, body BLOB,
+            etag TEXT, last_modified TEXT, fresh_until REAL, immutable INTEGER, last_access REAL)""")
+        self._conn.commit()
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+    def get(self, url, params=None, **kwargs):
+        key = url + ("?" + urlencode(sorted(params.items())) if params else "")
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("""SELECT status, headers, body, etag, last_modified, fresh_until, immutable
+                FROM responses WHERE key = ?""", (key,)).fetchone()
+
+        if row and (row[6] or row[5] > now):
+            self._count("hits")
+            self._touch(key, now)
+            return _build_response(url, row)
+
+        headers = dict(kwargs.pop('headers', None) or {})
+        if row:
+            if row[3]: headers['If-None-Match'] = row[3]
+            if row[4]: headers['If-Modified-Since'] = row[4]
+        resp = self._session.get(url, params=params, headers=headers, **kwargs)
+
+        if resp.status_code == 304 and row:
+            self._count("revalidated")
+            with self._lock, self._conn:
+                self._conn.execute("UPDATE responses SET fresh_until = ?, last_access = ? WHERE key = ?",
+                                   (now + self._ttl(resp), now, key))
+            return _build_response(url, row)
+
+        self._count("misses")
+        if resp.status_code == 200:
+            self._store(key, url, resp, now)
+        return resp
+
+    def close(self):
+        self.evict()
+        self._conn.close()
+
+    def evict(self):
+        """Drops entries unused for max_age, then the least recently used ones until under max_bytes."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses WHERE last_access < ?", (time.time() - self._max_age,))
+            total = 0
+            stale = []
+            for key, size in self._conn.execute(
+                    "SELECT key, length(body) FROM responses ORDER BY last_access DESC"):
+                total += size or 0
+                if total > self._max_bytes: stale.append((key,))
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def stats_line(self):
+        s = self.cache_stats
+        return f"🗄️  HTTP cache: {s['hits']} hits, {s['revalidated']} revalidated (304), {s['misses']} misses"
+
+    def _count(self, name):
+        with self._lock:
+            self.cache_stats[name] += 1
+        instrumentation.count(f"http_cache_{name}")
+
+    def _touch(self, key, now):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+
+    def _ttl(self, resp):
+        cache_control = resp.headers.get('Cache-Control', '')
+        m = re.search(r'max-age=(\d+)', cache_control)
+        return int(m.group(1)) if m else self._default_ttl
+
+    def _store(self, key, url, resp, now):
+        if 'no-store' in resp.headers.get('Cache-Control', ''): return
+        immutable = bool(self._immutable and self._immutable(url, resp))
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", (
+                key, url, resp.status_code, json.dumps(dict(resp.headers)), resp.content,
+                resp.headers.get('ETag'), resp.headers.get('Last-Modified'),
+                now + self._ttl(resp), int(immutable), now))
+
+def _build_response(url, row):
+    resp = Response()
+    resp.url = url
+    resp.status_code = row[0]
+    resp.headers = CaseInsensitiveDict(json.loads(row[1]))
+    resp._content = row[2]
+    resp.encoding = 'utf-8'
+    return resp
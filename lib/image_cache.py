@@ -0,0 +1,72 @@
+import os
+import hashlib
+
+from lib.atomic_io import atomic_write
+
+# --- PRINT-SIZE IMAGE DERIVATIVES ---
+# Full-resolution originals make fpdf2 produce huge PDFs. Each image is downscaled and recompressed
+# once for the target print width/DPI, and cached by source hash + settings so repeat exports reuse it.
+
+MM_PER_INCH = 25.4
+
+def _file_hash(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+class ImageDerivatives:
+    def __init__(self, cache_dir, width_mm=150, dpi=150, quality=70):
+        self.cache_dir = cache_dir
+        self.max_width_px = int(round(width_mm / MM_PER_INCH * dpi))
+        self.quality = quality
+        self.created = 0
+        self.reused = 0
+        self._hashes = {}
+        try:
+            from PIL import Image
+            self._image = Image
+        except ImportError:
+            print("⚠️ Pillow not installed. Embedding original images. (pip install Pillow)")
+            self._image = None
+
+    def get(self, src_path):
+        """Returns the path of a print-size JPEG for src_path (or src_path itself if it can't be converted)."""
+        if self._image is None: return src_path
+
+        st = os.stat(src_path)
+        stamp = (src_path, st.st_size, st.st_mtime_ns)
+        if stamp not in self._hashes:
+            self._hashes[stamp] = _file_hash(src_path)
+        key = f"{self._hashes[stamp]}_{self.max_width_px}w_q{self.quality}"
+        out_path = os.path.join(self.cache_dir, f"{key}.jpg")
+        if os.path.exists(out_path):
+            self.reused += 1
+            return out_path
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        try:
+            with self._image.open(src_path) as img:
+                img.seek(0)  # first frame of animated GIFs
+                if img.width > self.max_width_px:
+                    height = max(1, round(img.height * self.max_width_px / img.width))
+                    img = img.resize((self.max_width_px, height), self._image.LANCZOS)
+                img = self._flatten(img)
+                with atomic_write(out_path, 'wb') as f:
+                    img.save(f, format="JPEG", quality=self.quality, optimize=True, progressive=True)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not downscale {os.path.basename(src_path)}: {e}")
+            return src_path
+
+        self.created += 1
+        return out_path
+
+    def _flatten(self, img):
+        """JPEG has no alpha channel: composite transparent images on white."""
+        if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+            img = img.convert("RGBA")
+            background = self._image.new("RGB", img.size, (255, 255, 255))
+            background.paste(img, mask=img.split()[-1])
+            return background
+        return img.convert("RGB") if img.mode != "RGB" else img
@@ -0,0 +1,106 @@
+import io
+import os
+import json
+import hashlib
+from contextlib import contextmanager
+from datetime import datetime
+
+from lib.atomic_io import write_json
+
+# --- INGESTION LEDGER ---
+# Remembers which input files were already parsed (size, mtime, content hash), so a re-run only
+# touches new or changed dumps. A file that was merely touched (same bytes) still counts as unchanged.
+
+def file_sha256(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+class _HashingReader(io.RawIOBase):
+    """Raw reader that hashes every byte it hands out."""
+    def __init__(self, f):
+        self.f = f
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = self.f.readinto(buffer)
+        if n:
+            self.sha256.update(memoryview(buffer)[:n])
+            self.size += n
+        return n
+
+@contextmanager
+def open_stamped(path, stamp):
+    """
+    Opens `path` as UTF-8 text and on exit fills the dict `stamp` with the size, mtime and sha256 of the
+    bytes that were actually read (the parser's leftovers included), for IngestLedger.record().
+    A dump rewritten while it was being parsed then doesn't match its entry and is parsed again next time.
+    """
+    with open(path, 'rb') as f:
+        mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+        raw = _HashingReader(f)
+        try:
+            yield io.TextIOWrapper(io.BufferedReader(raw), encoding='utf-8')
+        finally:
+            for _ in iter(lambda: raw.read(1024 * 1024), b""): pass
+            stamp.update(size=raw.size, mtime_ns=mtime_ns, sha256=raw.sha256.hexdigest())
+
+class IngestLedger:
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self._dirty = False
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (json.JSONDecodeError, OSError):
+                print(f"⚠️ Ingestion ledger unreadable, all dumps will be re-parsed.")
+
+    def unchanged(self, path):
+        """True if `path` was ingested before and its content did not change since."""
+        entry = self.entries.get(os.path.abspath(path))
+        if not entry: return False
+        st = os.stat(path)
+        if st.st_size == entry['size'] and st.st_mtime_ns == entry['mtime_ns']: return True
+        if st.st_size != entry['size'] or file_sha256(path) != entry['sha256']: return False
+        # Same bytes, new mtime: remember the new stamp to skip hashing next time
+        entry['mtime_ns'] = st.st_mtime_ns
+        self._dirty = True
+        return True
+
+    def record(self, path, kind=None, stamp=None):
+        """
+        Marks `path` as ingested. `stamp` (from open_stamped) describes the bytes that were parsed;
+        without it the file is stat'ed and hashed now.
+        """
+        if stamp is None:
+            st = os.stat(path)
+            stamp = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": file_sha256(path)}
+        self.entries[os.path.abspath(path)] = dict(
+            stamp, kind=kind, ingested=datetime.now().isoformat(timespec='seconds'))
+        self._dirty = True
+
+    def prune(self, existing_paths):
+        """Forgets files that no longer exist. Returns the removed entries {path: entry}."""
+        existing = {os.path.abspath(p) for p in existing_paths}
+        removed = {p: e for p, e in self.entries.items() if p not in existing}
+        for p in removed:
+            del self.entries[p]
+        self._dirty = self._dirty or bool(removed)
+        return removed
+
+    def reset(self):
+        self._dirty = self._dirty or bool(self.entries)
+        self.entries = {}
+
+    def save(self):
+        if not self._dirty: return
+        write_json(self.path, self.entries, indent=2)
+        self._dirty = False
@@ -0,0 +1,162 @@
+import os
+import sys
+import time
+import platform
+import threading
+from datetime import datetime
+
+from lib.atomic_io import write_json
+
+# --- RUN INSTRUMENTATION ---
+# Timed spans and counters for one exporter run, written as a JSON report at the end.
+# Disabled by default: span() hands out a shared no-op context manager and count() returns
+# after a single flag check, so the calls can stay in hot loops.
+#
+#   with instrumentation.span("parse"): ...
+#   instrumentation.count("bytes_downloaded", len(chunk))
+
+_enabled = False
+_lock = threading.Lock()
+_counters = {}
+_spans = {}
+_started = None
+_profiler = None
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        with _lock:
+            stats = _spans.get(self.name)
+            if stats is None:
+                stats = _spans[self.name] = {"calls": 0, "total_s": 0.0, "max_s": 0.0}
+            stats["calls"] += 1
+            stats["total_s"] += elapsed
+            if elapsed > stats["max_s"]: stats["max_s"] = elapsed
+        return False
+
+def enable(profile=False):
+    """
+    Starts collecting spans/counters (and cProfile data of the main thread with profile=True).
+    Anything recorded before is dropped, so exporters run one after another in one process
+    (export_all.py --sequential) each get a report of their own run only.
+    """
+    global _enabled, _started, _profiler
+    with _lock:
+        _counters.clear()
+        _spans.clear()
+    _enabled = True
+    _started = time.perf_counter()
+    if profile:
+        import cProfile
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+
+def disable():
+    """Stops collecting and drops what was recorded (an exporter run without --report after one with it)."""
+    global _enabled, _started, _profiler
+    _enabled = False
+    _started = None
+    if _profiler is not None:
+        _profiler.disable()
+        _profiler = None
+    with _lock:
+        _counters.clear()
+        _spans.clear()
+
+def is_enabled():
+    return _enabled
+
+def span(name):
+    """Context manager timing a phase. Spans with the same name are aggregated."""
+    return _Span(name) if _enabled else _NULL_SPAN
+
+def count(name, value=1):
+    if not _enabled: return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+def collect():
+    """
+    Takes the spans/counters recorded in this process so far (and clears them), for a worker process
+    to return to its parent, which adds them to its own with merge().
+    """
+    with _lock:
+        data = {"spans": {name: dict(s) for name, s in _spans.items()}, "counters": dict(_counters)}
+        _spans.clear()
+        _counters.clear()
+    return data
+
+def merge(data):
+    """Adds spans/counters collected in a worker process (see collect) to this process's."""
+    if not _enabled or not data: return
+    with _lock:
+        for name, s in data["spans"].items():
+            stats = _spans.get(name)
+            if stats is None:
+                _spans[name] = dict(s)
+                continue
+            stats["calls"] += s["calls"]
+            stats["total_s"] += s["total_s"]
+            if s["max_s"] > stats["max_s"]: stats["max_s"] = s["max_s"]
+        for name, value in data["counters"].items():
+            _counters[name] = _counters.get(name, 0) + value
+
+def report(**extra):
+    """Snapshot of everything recorded so far as a JSON-serializable dict."""
+    with _lock:
+        spans = {name: {"calls": s["calls"], "total_s": round(s["total_s"], 4), "max_s": round(s["max_s"], 4)}
+                 for name, s in _spans.items()}
+        counters = dict(_counters)
+    return {
+        "finished": datetime.now().isoformat(timespec='seconds'),
+        "command": " ".join([os.path.basename(sys.argv[0])] + sys.argv[1:]),
+        "python": platform.python_version(),
+        "wall_s": round(time.perf_counter() - _started, 4) if _started else None,
+        "spans": spans,
+        "counters": counters,
+        **extra,
+    }
+
+def finish(report_path, profile_path=None, **extra):
+    """
+    Stops profiling, writes the run report (and pstats dump) and prints a one-line summary.
+    Collection stops too, so a later exporter run in the same process starts clean.
+    """
+    global _profiler
+    if not _enabled: return None
+
+    if _profiler is not None and profile_path:
+        _profiler.disable()
+        _profiler.dump_stats(profile_path)
+        _profiler = None
+        print(f"🔬 Profile saved to {profile_path} (python -m pstats {os.path.basename(profile_path)})")
+
+    data = report(**extra)
+    os.makedirs(os.path.dirname(os.path.abspath(report_path)), exist_ok=True)
+    write_json(report_path, data, indent=2)
+
+    phases = " | ".join(f"{name} {s['total_s']:.2f}s" for name, s in data["spans"].items())
+    print(f"⏱️  {phases}")
+    print(f"📊 Run report saved to {report_path}")
+    disable()
+    return data
@@ -0,0 +1,135 @@
+import os
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from lib import instrumentation
+from lib.media_store import sniff_extension
+
+# --- POOLED MEDIA DOWNLOADER ---
+
+class MediaFetcher:
+    """
+    Bounded worker pool that downloads media assets over one shared keep-alive session
+    into a content-addressed MediaStore. Bodies are streamed to a temp file and atomically
+    renamed into place, so a crash never leaves a half-written image behind.
+    Known URLs are revalidated with If-None-Match / If-Modified-Since (revalidate=False skips the network).
+    """
+    def __init__(self, store, max_workers=8, retries=3, backoff=0.5, timeout=10, chunk_size=64 * 1024,
+                 revalidate=True):
+        self.store = store
+        self.revalidate = revalidate
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.failures = []
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="media")
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._attached = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def submit(self, url):
+        """Schedules a download and returns a Future resolving to the local path (or None)."""
+        with self._lock:
+            # Same URL requested twice (e.g. post present in two dumps) -> share the work
+            if url not in self._inflight:
+                self._inflight[url] = self._executor.submit(self._download, url)
+            return self._inflight[url]
+
+    def attach(self, message, futures):
+        """Registers pending downloads whose results become message.media on finalize()."""
+        with self._lock:
+            self._attached.append((message, futures))
+
+    def finalize(self):
+        """Waits for all attached downloads and fills media lists in asset order."""
+        with self._lock:
+            attached, self._attached = self._attached, []
+        for message, futures in attached:
+            message.media = [{"type": "image", "url": loc} for loc in (f.result() for f in futures) if loc]
+
+    def report(self):
+        if not self.failures:
+            return
+        print(f"⚠️ {len(self.failures)} media download(s) failed:")
+        for url, error in self.failures:
+            print(f"   - {url[:80]}: {error}")
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.session.close()
+        self.store.save()
+
+    def _download(self, url):
+        cached = self.store.lookup(url)
+        if cached and not self.revalidate:
+            instrumentation.count("media_cached")
+            return cached
+        headers = self.store.conditional_headers(url) if cached else {}
+
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                instrumentation.count("media_retries")
+                time.sleep(self.backoff * (2 ** (attempt - 1)))
+            instrumentation.count("media_requests")
+            try:
+                with self.session.get(url, timeout=self.timeout, stream=True, headers=headers) as resp:
+                    if resp.status_code == 304 and cached:
+                        instrumentation.count("media_not_modified")
+                        return cached
+                    if resp.status_code != 200:
+                        last_error = f"HTTP {resp.status_code}"
+                        # Client errors will not get better with retries
+                        if 400 <= resp.status_code < 500 and resp.status_code != 429: break
+                        continue
+                    return self._write_atomic(url, resp)
+            except (requests.RequestException, OSError) as e:
+                last_error = f"{type(e).__name__}: {e}"
+
+        # An expired/unreachable source still has a perfectly good local copy
+        if cached: return cached
+        instrumentation.count("media_failed")
+        with self._lock:
+            self.failures.append((url, last_error))
+        return None
+
+    def _write_atomic(self, url, resp):
+        f, tmp_path = self.store.temp_file()
+        sha256 = hashlib.sha256()
+        head = b""
+        size = 0
+        try:
+            with f:
+                for chunk in resp.iter_content(chunk_size=self.chunk_size):
+                    if not chunk: continue
+                    if len(head) < 16: head += chunk[:16]
+                    sha256.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            instrumentation.count("media_downloaded")
+            instrumentation.count("bytes_downloaded", size)
+            ext = sniff_extension(head, resp.headers.get('Content-Type'))
+            return self.store.ingest(url, tmp_path, sha256.hexdigest(), ext, resp.headers)
+        except BaseException:
+            if os.path.exists(tmp_path): os.remove(tmp_path)
+            raise
@@ -0,0 +1,117 @@
+import os
+import json
+import tempfile
+import threading
+import mimetypes
+
+from lib.atomic_io import atomic_write, fsync_dir
+
+# --- CONTENT-ADDRESSED MEDIA STORE ---
+
+INDEX_FILENAME = "media_index.json"
+
+_MAGIC = [
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+    (b"%PDF", ".pdf"),
+]
+_CONTENT_TYPES = {"image/jpeg": ".jpg", "image/jpg": ".jpg", "image/png": ".png", "image/gif": ".gif",
+                  "image/webp": ".webp", "image/svg+xml": ".svg"}
+
+def sniff_extension(head, content_type=None):
+    """Guesses a file extension from magic bytes first, then from the Content-Type header."""
+    for magic, ext in _MAGIC:
+        if head.startswith(magic): return ext
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP": return ".webp"
+    ctype = (content_type or "").split(";")[0].strip().lower()
+    if ctype in _CONTENT_TYPES: return _CONTENT_TYPES[ctype]
+    return (mimetypes.guess_extension(ctype) if ctype else None) or ".bin"
+
+class MediaStore:
+    """
+    Media files named by their SHA-256 (`{hash}{ext}`), so an image reused across posts is stored once.
+    media_index.json maps source URL -> hash, ext, ETag and Last-Modified for conditional revalidation.
+    """
+    def __init__(self, media_dir):
+        self.media_dir = media_dir
+        self.index_path = os.path.join(media_dir, INDEX_FILENAME)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+
+    def lookup(self, url):
+        """Returns the local path already known for a URL, or None."""
+        with self._lock:
+            entry = self.index.get(url)
+        if not entry: return None
+        path = os.path.join(self.media_dir, entry['hash'] + entry['ext'])
+        return path if os.path.exists(path) else None
+
+    def conditional_headers(self, url):
+        with self._lock:
+            entry = self.index.get(url) or {}
+        headers = {}
+        if entry.get('etag'): headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'): headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def temp_file(self):
+        """Opens a temp file inside the media dir (same filesystem -> atomic rename)."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.media_dir, suffix=".part")
+        return os.fdopen(fd, 'wb'), tmp_path
+
+    def ingest(self, url, tmp_path, sha256, ext, headers):
+        """
+        Moves a finished (fsync'ed) download into place under its content hash and records it in the index.
+        Leftover *.part files of interrupted downloads are removed by collect_garbage().
+        """
+        final_path = os.path.join(self.media_dir, sha256 + ext)
+        if os.path.exists(final_path):
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, final_path)
+            fsync_dir(self.media_dir)
+        with self._lock:
+            self.index[url] = {"hash": sha256, "ext": ext,
+                               "etag": headers.get('ETag'), "last_modified": headers.get('Last-Modified')}
+            self._dirty = True
+        return final_path
+
+    def save(self):
+        with self._lock:
+            if not self._dirty: return
+            data = json.dumps(self.index, indent=2, ensure_ascii=False)
+            self._dirty = False
+        with atomic_write(self.index_path) as f:
+            f.write(data)
+
+    def collect_garbage(self, referenced_paths):
+        """
+        Deletes media files this store downloaded (listed in the index) that no message references any more,
+        plus leftover *.part files. Other files in the folder (older `{post}_{i}.ext` downloads, anything
+        put there by hand) are left alone. Returns the number of files removed.
+        """
+        keep = {os.path.basename(p) for p in referenced_paths}
+        with self._lock:
+            stale = [url for url, e in self.index.items() if e['hash'] + e['ext'] not in keep]
+            owned = {self.index[url]['hash'] + self.index[url]['ext'] for url in stale}
+            for url in stale: del self.index[url]
+            self._dirty = self._dirty or bool(stale)
+        removed = 0
+        for name in os.listdir(self.media_dir):
+            if name in keep or not (name in owned or name.endswith(".part")): continue
+            path = os.path.join(self.media_dir, name)
+            if os.path.isfile(path):
+                os.remove(path)
+                removed += 1
+        self.save()
+        return removed
+
+def referenced_media(messages):
+    """All local media paths referenced by a dict of messages."""
+    return [item['url'] for m in messages.values() for item in m.media if item.get('type') == 'image']
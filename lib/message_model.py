@@ -1,27 +1,108 @@
-import json
+import sys
+from functools import lru_cache
+from operator import attrgetter
+
+@lru_cache(maxsize=None)
+def _field_names(cls):
+    """
+    All __slots__ of a class hierarchy (base classes first), a getter returning their values,
+    and whether instances also carry a __dict__ (a subclass that didn't declare __slots__).
+    """
+    names = []
+    for klass in reversed(cls.__mro__):
+        slots = klass.__dict__.get('__slots__', ())
+        if isinstance(slots, str): slots = (slots,)
+        # Private slots (e.g. _body) are bookkeeping, not message data
+        names.extend(s for s in slots if not s.startswith('_') and s not in names)
+    has_dict = any('__slots__' not in klass.__dict__ for klass in cls.__mro__ if klass is not object)
+    return tuple(names), attrgetter(*names), has_dict
+
+@lru_cache(maxsize=None)
+def _record_fields(cls):
+    """Like _field_names, without 'content' (see BaseMessage.to_record)."""
+    names, _, has_dict = _field_names(cls)
+    names = tuple(n for n in names if n != 'content')
+    return names, attrgetter(*names), has_dict
+
+def _detached(value):
+    """One-level copy of containers so serialized data never aliases live message state."""
+    kind = type(value)
+    if kind is list:
+        return [dict(v) if type(v) is dict else v for v in value]
+    if kind is dict:
+        return dict(value)
+    return value
 
 class BaseMessage:
-    def __init__(self, id, date, status, content, subject=None, preview=None, 
+    # _body: (load_body, content_hash) of a message built by from_index() whose content is not read yet
+    __slots__ = ('id', 'date', 'status', 'content', 'subject', 'preview', 'media', 'source', 'subchannel', '_body')
+
+    def __init__(self, id, date, status, content, subject=None, preview=None,
                  media=None, source=None, subchannel=None):
         self.id = str(id)
         self.date = date
-        self.status = status.lower()
+        # status/source/subchannel repeat on every message; interned, they share one string object
+        self.status = sys.intern(status.lower())
         self.content = content
         self.subject = subject
         self.preview = preview
         self.media = media if media is not None else []
-        self.source = source
-        self.subchannel = subchannel
+        self.source = sys.intern(source) if source else source
+        self.subchannel = sys.intern(subchannel) if subchannel else subchannel
 
     def to_dict(self):
-        """Converts the object to a dictionary for JSON serialization."""
-        return self.__dict__
+        """Converts the object to a new dictionary for JSON serialization (safe to mutate)."""
+        names, getter, has_dict = _field_names(type(self))
+        data = dict(zip(names, map(_detached, getter(self))))
+        if has_dict:
+            # Subclasses that don't declare __slots__ keep their extra fields in __dict__
+            data.update((k, _detached(v)) for k, v in self.__dict__.items())
+        return data
+
+    def __getattr__(self, name):
+        # Only reached for unset slots: the content of a lazily loaded message is read on first access
+        if name == 'content':
+            try:
+                load_body, _ = object.__getattribute__(self, '_body')
+            except AttributeError:
+                pass
+            else:
+                self.content = load_body(self.id)
+                self._body = None
+                return self.content
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+    def to_record(self):
+        """
+        (fields, content, content_hash) for the storage backend: fields is to_dict() without 'content'.
+        A lazily loaded message whose content was never read returns (fields, None, stored content hash),
+        so saving it doesn't read the body back in.
+        """
+        names, getter, has_dict = _record_fields(type(self))
+        data = dict(zip(names, map(_detached, getter(self))))
+        if has_dict:
+            data.update((k, _detached(v)) for k, v in self.__dict__.items())
+        try:
+            return data, BaseMessage.content.__get__(self), None
+        except AttributeError:
+            return data, None, self._body[1]
 
     @classmethod
     def from_dict(cls, data):
         """Creates an instance of the class from a dictionary loaded from JSON."""
         return cls(**data)
 
+    @classmethod
+    def from_index(cls, data, load_body, content_hash):
+        """
+        A lazily loaded instance: `data` holds every field except 'content', which is fetched with
+        load_body(id) the first time it is accessed. `content_hash` identifies the stored content.
+        """
+        msg = cls.from_dict(dict(data, content=None))
+        del msg.content
+        msg._body = (load_body, content_hash)
+        return msg
+
     def to_markdown(self, index, media_base_path=None):
         """Generates a Markdown fragment for this specific message."""
         lines = [
@@ -0,0 +1,276 @@
+import os
+from datetime import datetime, timezone
+
+from lib import instrumentation
+from lib.atomic_io import atomic_write
+
+# --- COLUMNAR METRICS STORE ---
+# Engagement metrics (impressions, engagementRate, ...) as a history of snapshots in flat NumPy columns,
+# one row per (message, metric, snapshot), saved as {platform}_metrics.npz.
+# A snapshot is taken when a dump is parsed (stamped with the dump's modification time) and a row is
+# only appended when the value changed, so re-parsing the same dumps adds nothing.
+# Aggregations work on whole columns; no message objects are loaded.
+
+COLUMNS = {"message": "<u4", "metric": "<u2", "posted": "<i8", "taken": "<i8", "value": "<f8"}
+PERIODS = ("day", "month", "quarter", "year")
+# Rates are never averaged directly: they are recomputed as sum(rate * impressions) / sum(impressions)
+RATE_WEIGHT = "impressions"
+
+def open_metrics_store(path):
+    """MetricsStore at `path`, or None when NumPy is not installed."""
+    try:
+        import numpy
+    except ImportError:
+        print("ℹ️ NumPy not installed, engagement metrics history not recorded. (pip install numpy)")
+        return None
+    return MetricsStore(path, numpy)
+
+def to_epoch(iso):
+    """ISO 8601 timestamp ('Z' suffix allowed, naive = UTC) -> Unix seconds, None if unparseable."""
+    try:
+        dt = datetime.fromisoformat(iso.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+    if dt.tzinfo is None: dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+def is_rate(metric):
+    return metric.endswith("Rate")
+
+class MetricsStore:
+    def __init__(self, path, np):
+        self.path = path
+        self.np = np
+        self.ids, self.types = [], []
+        self.columns = {name: np.zeros(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+        if os.path.exists(path):
+            try:
+                with np.load(path, allow_pickle=False) as data:
+                    self.ids, self.types = data['ids'].tolist(), data['types'].tolist()
+                    self.columns = {name: data[name].astype(dtype, copy=False) for name, dtype in COLUMNS.items()}
+            except (OSError, ValueError, KeyError):
+                print(f"⚠️ Metrics store unreadable, starting a new history.")
+        self._id_index = {mid: i for i, mid in enumerate(self.ids)}
+        self._type_index = {t: i for i, t in enumerate(self.types)}
+        self._pending = []
+        self._dirty = False
+        self._seen = None
+        self._latest_rows = None
+
+    def __len__(self):
+        return len(self.columns['value']) + len(self._pending)
+
+    def _index(self, lookup, values, key):
+        if key not in lookup:
+            lookup[key] = len(values)
+            values.append(key)
+        return lookup[key]
+
+    def _latest_index(self):
+        """Row numbers of the latest snapshot of every (message, metric)."""
+        np = self.np
+        self._flush()
+        if self._latest_rows is None:
+            c = self.columns
+            key = c['message'].astype(np.int64) * max(len(self.types), 1) + c['metric']
+            order = np.lexsort((c['taken'], key))
+            last = np.append(key[order][1:] != key[order][:-1], True) if len(order) else np.zeros(0, dtype=bool)
+            self._latest_rows = order[last]
+        return self._latest_rows
+
+    def _load_seen(self):
+        """{(message, metric): (taken, value)} of the latest stored snapshots, built on first record()."""
+        c, rows = self.columns, self._latest_index()
+        self._seen = {(m, t): (taken, value) for m, t, taken, value in zip(
+            c['message'][rows].tolist(), c['metric'][rows].tolist(), c['taken'][rows].tolist(), c['value'][rows].tolist())}
+
+    def record(self, messages, taken):
+        """
+        Adds a snapshot of `messages`' metrics taken at Unix time `taken`. A value is stored when it is
+        newer than and differs from the latest snapshot of the same message/metric (so dumps older than
+        the history, e.g. re-parsed by --full, add nothing). Returns the rows added.
+        """
+        if self._seen is None: self._load_seen()
+        added = 0
+        for msg in messages:
+            metrics = getattr(msg, 'metrics', None)
+            posted = to_epoch(msg.date)
+            if not metrics or posted is None: continue
+            m = self._index(self._id_index, self.ids, msg.id)
+            for metric, value in metrics.items():
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    continue
+                t = self._index(self._type_index, self.types, metric)
+                last = self._seen.get((m, t))
+                if last and (taken <= last[0] or value == last[1]): continue
+                self._seen[(m, t)] = (taken, value)
+                self._pending.append((m, t, posted, taken, value))
+                added += 1
+        if added: self._latest_rows = None
+        instrumentation.count("metric_snapshots_added", added)
+        return added
+
+    def _flush(self):
+        """Moves recorded rows into the columns."""
+        if not self._pending: return
+        np = self.np
+        for (name, dtype), values in zip(COLUMNS.items(), zip(*self._pending)):
+            self.columns[name] = np.concatenate((self.columns[name], np.array(values, dtype=dtype)))
+        self._pending = []
+        self._dirty = True
+
+    def save(self):
+        self._flush()
+        if not self._dirty: return
+        np = self.np
+        with atomic_write(self.path, 'wb') as f:
+            np.savez(f, ids=np.array(self.ids, dtype=str), types=np.array(self.types, dtype=str), **self.columns)
+        self._dirty = False
+
+    # --- Aggregations (vectorized over the columns) ---
+
+    def latest(self, metric, ids=None):
+        """
+        Latest snapshot of `metric` per message: (message indices, posted, values) as arrays.
+        `ids` (an iterable of message ids) restricts the result to those messages.
+        """
+        np = self.np
+        c, rows = self.columns, self._latest_index()
+        t = self._type_index.get(metric)
+        rows = rows[c['metric'][rows] == t] if t is not None else rows[:0]
+        if ids is not None:
+            wanted = np.array([self._id_index[i] for i in ids if i in self._id_index], dtype=np.uint32)
+            rows = rows[np.isin(c['message'][rows], wanted)]
+        return c['message'][rows], c['posted'][rows], c['value'][rows]
+
+    def _weights_for(self, messages, ids=None):
+        """Latest RATE_WEIGHT value for each message index in `messages` (0 where unknown)."""
+        np = self.np
+        dense = np.zeros(len(self.ids), dtype=np.float64)
+        m, _, v = self.latest(RATE_WEIGHT, ids)
+        dense[m] = v
+        return dense[messages]
+
+    def by_period(self, metric, period="month", ids=None):
+        """
+        [{"period", "posts", "total", "mean"}] per posting period, oldest first. Counts are summed;
+        rates are recomputed per period from the impressions (total is then the weighted rate).
+        """
+        np = self.np
+        if period not in PERIODS: raise ValueError(f"period must be one of {', '.join(PERIODS)}")
+        messages, posted, values = self.latest(metric, ids)
+        if not len(values): return []
+
+        stamps = posted.astype('datetime64[s]')
+        if period == "day": keys = stamps.astype('datetime64[D]').astype(np.int64)
+        elif period == "year": keys = stamps.astype('datetime64[Y]').astype(np.int64)
+        else:
+            keys = stamps.astype('datetime64[M]').astype(np.int64)
+            if period == "quarter": keys = keys // 3
+        periods, inverse = np.unique(keys, return_inverse=True)
+        posts = np.bincount(inverse, minlength=len(periods))
+        if is_rate(metric):
+            weights = self._weights_for(messages, ids)
+            weighted = np.bincount(inverse, weights=values * weights, minlength=len(periods))
+            weight_sums = np.bincount(inverse, weights=weights, minlength=len(periods))
+            totals = np.divide(weighted, weight_sums, out=np.full(len(periods), np.nan), where=weight_sums > 0)
+            means = np.bincount(inverse, weights=values, minlength=len(periods)) / posts
+        else:
+            totals = np.bincount(inverse, weights=values, minlength=len(periods))
+            means = totals / posts
+        return [{"period": _period_label(np, period, key), "posts": int(n), "total": _round(total), "mean": _round(mean)}
+                for key, n, total, mean in zip(periods.tolist(), posts.tolist(), totals.tolist(), means.tolist())]
+
+    def top(self, metric, k=50, ids=None):
+        """The k messages with the highest latest `metric`: [{"id", "posted", "value"}], best first."""
+        np = self.np
+        messages, posted, values = self.latest(metric, ids)
+        if not len(values): return []
+        k = min(k, len(values))
+        best = np.argpartition(-values, k - 1)[:k]
+        best = best[np.argsort(-values[best], kind='stable')]
+        return [{"id": self.ids[m], "posted": _iso(p), "value": _round(v)}
+                for m, p, v in zip(messages[best].tolist(), posted[best].tolist(), values[best].tolist())]
+
+    def totals(self, ids=None):
+        """{metric: {"posts", "total", "mean"}} over all messages (rates recomputed from impressions)."""
+        result = {}
+        for metric in self.types:
+            messages, _, values = self.latest(metric, ids)
+            if not len(values): continue
+            if is_rate(metric):
+                weights = self._weights_for(messages, ids)
+                total = float((values * weights).sum() / weights.sum()) if weights.sum() else float('nan')
+            else:
+                total = float(values.sum())
+            result[metric] = {"posts": int(len(values)), "total": _round(total), "mean": _round(float(values.mean()))}
+        return result
+
+    def history(self, message_id):
+        """All snapshots of one message: [{"metric", "taken", "value"}] in snapshot order."""
+        np = self.np
+        self._flush()
+        m = self._id_index.get(message_id)
+        if m is None: return []
+        c = self.columns
+        rows = np.flatnonzero(c['message'] == m)
+        rows = rows[np.lexsort((c['metric'][rows], c['taken'][rows]))]
+        return [{"metric": self.types[t], "taken": _iso(taken), "value": _round(v)}
+                for t, taken, v in zip(c['metric'][rows].tolist(), c['taken'][rows].tolist(), c['value'][rows].tolist())]
+
+def _iso(epoch):
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def _round(value):
+    return None if value != value else round(value, 2)
+
+def _period_label(np, period, key):
+    if period == "quarter":
+        return f"{1970 + key // 4}-Q{key % 4 + 1}"
+    unit = {"day": "D", "month": "M", "year": "Y"}[period]
+    return str(np.datetime64(key, unit))
+
+def summary_markdown(store, messages, months=12, top=10):
+    """
+    'Engagement Summary' section for the export: per-month totals of the last `months` calendar months
+    and the `top` posts by impressions. Only `messages` (id -> message) are included.
+    """
+    ids = list(messages)
+    totals = store.totals(ids)
+    if not totals: return ""
+    metrics = sorted(totals, key=lambda m: (is_rate(m), m))
+
+    def label(metric):
+        return metric.replace('Rate', ' Rate').title()
+
+    def cell(metric, value):
+        if value is None: return "-"
+        return f"{value:.2f}%" if is_rate(metric) else f"{value:,.0f}"
+
+    lines = ["## Engagement Summary", ""]
+    lines.append(" | ".join(["| Month", "Posts"] + [label(m) for m in metrics]) + " |")
+    lines.append("|" + "---|" * (len(metrics) + 2))
+    rows = {}
+    for metric in metrics:
+        for row in store.by_period(metric, "month", ids):
+            rows.setdefault(row['period'], {"posts": 0})[metric] = row['total']
+            rows[row['period']]['posts'] = max(rows[row['period']]['posts'], row['posts'])
+    # Calendar months (the current one included), not the last `months` months that happen to have posts
+    now = datetime.now(timezone.utc)
+    first = now.year * 12 + now.month - 1 - (months - 1)
+    since = f"{first // 12:04d}-{first % 12 + 1:02d}"
+    for period in sorted(p for p in rows if p >= since):
+        values = rows[period]
+        lines.append(" | ".join([f"| {period}", str(values['posts'])] + [cell(m, values.get(m)) for m in metrics]) + " |")
+    lines.append(" | ".join(["| **All time**", str(max(t['posts'] for t in totals.values()))]
+                            + [cell(m, totals[m]['total']) for m in metrics]) + " |")
+
+    best = store.top(RATE_WEIGHT, top, ids)
+    if best:
+        lines += ["", f"### Top {len(best)} posts by {label(RATE_WEIGHT).lower()}", ""]
+        for n, row in enumerate(best, 1):
+            title = " ".join((messages[row['id']].content or "").split())[:80]
+            lines.append(f"{n}. {row['posted'][:10]} — {cell(RATE_WEIGHT, row['value'])} — {title}")
+    return "\n".join(lines) + "\n\n"
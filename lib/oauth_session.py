@@ -2,6 +2,8 @@ from requests_oauthlib import OAuth2Session
 import json
 import os
 
+from lib.atomic_io import write_json
+
 # --- OAUTH2 SESSION MANAGEMENT ---
 def setup_oauth_session(client_id, client_secret, token_file, auth_url, token_url, redirect_uri, scopes):
     """
@@ -9,8 +11,7 @@ def setup_oauth_session(client_id, client_secret, token_file, auth_url, token_ur
     """
     
     def token_updater(token):
-        with open(token_file, 'w') as f:
-            json.dump(token, f)
+        write_json(token_file, token)
         print(f"🔄 Token refreshed and saved to {os.path.basename(token_file)}")
 
     token = None
@@ -0,0 +1,111 @@
+import os
+import sqlite3
+import hashlib
+
+from lib import instrumentation
+from lib.storage import digest, record_hash
+from lib.atomic_io import atomic_write
+
+# --- INCREMENTAL MARKDOWN RENDERING ---
+
+# Fragments are cached without their position in the export; the index is spliced in at write time.
+INDEX_TOKEN = "\x00INDEX\x00"
+# Bump whenever to_markdown() output changes, so stale fragments get re-rendered.
+# Keys hash the message record (see BaseMessage.to_record()), so unread lazy bodies stay unread.
+RENDER_VERSION = 1
+
+class RenderCache:
+    """Stores each message's rendered Markdown fragment keyed by a hash of its fields."""
+    def __init__(self, path):
+        self.path = path
+        self.rendered = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("CREATE TABLE IF NOT EXISTS fragments (id TEXT PRIMARY KEY, hash TEXT, markdown TEXT)")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        return conn
+
+    def fragments(self, messages, media_base_path=None):
+        """Returns {id: fragment} for all messages, re-rendering only the ones whose data changed."""
+        conn = self._connect()
+        try:
+            with conn:
+                cached = {mid: (h, md) for mid, h, md in conn.execute("SELECT id, hash, markdown FROM fragments")}
+                result, updates = {}, []
+                for mid, msg in messages.items():
+                    key = digest(f"{RENDER_VERSION}|{type(msg).__name__}|{media_base_path}|{record_hash(*msg.to_record())}")
+                    hit = cached.get(mid)
+                    if hit and hit[0] == key:
+                        result[mid] = hit[1]
+                        continue
+                    result[mid] = msg.to_markdown(INDEX_TOKEN, media_base_path=media_base_path)
+                    updates.append((mid, key, result[mid]))
+
+                conn.executemany("INSERT OR REPLACE INTO fragments (id, hash, markdown) VALUES (?, ?, ?)", updates)
+                conn.executemany("DELETE FROM fragments WHERE id = ?", [(mid,) for mid in cached if mid not in messages])
+        finally:
+            conn.close()
+        self.rendered = len(updates)
+        return result
+
+    def get_meta(self, key):
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+        finally:
+            conn.close()
+
+def cached_fragments(cache, messages, paths, overrides=None):
+    """
+    Fragments for all messages from `cache` (re-rendering changed ones), with a progress line.
+    `overrides` {id: fragment} replaces individual fragments (e.g. collapsed duplicates).
+    """
+    fragments = cache.fragments(messages, media_base_path=paths.get('media'))
+    print(f"🧩 Rendered {cache.rendered} changed fragment(s), {len(messages) - cache.rendered} from cache.")
+    instrumentation.count("fragments_rendered", cache.rendered)
+    instrumentation.count("fragments_cached", len(messages) - cache.rendered)
+    if overrides: fragments.update(overrides)
+    return fragments
+
+def write_export(messages, paths, list_name, title, generated, skip_unchanged=False, overrides=None, summary=None):
+    """
+    Streams cached fragments into the Markdown export in date order (newest first).
+    With skip_unchanged, the file is left untouched when its body hash did not change
+    (the `Generated:` header is excluded from the hash). `summary` is written before the messages.
+    Returns True if the file was written.
+    """
+    cache = RenderCache(paths['render_cache'])
+    fragments = cached_fragments(cache, messages, paths, overrides)
+    order = sorted(messages.items(), key=lambda kv: kv[1].date, reverse=True)
+
+    summary = summary or ""
+    body_hash = hashlib.sha1(f"# {title}: {list_name}\n{summary}".encode('utf-8'))
+    for mid, _ in order:
+        body_hash.update(mid.encode('utf-8') + b"\x00")
+        body_hash.update(fragments[mid].encode('utf-8'))
+    body_hash = body_hash.hexdigest()
+
+    if skip_unchanged and os.path.exists(paths['export']) and cache.get_meta("export_hash") == body_hash:
+        print(f"⏭️  Export unchanged, skipping rewrite of {os.path.basename(paths['export'])}.")
+        return False
+
+    print(f"📄 Writing {len(order)} items to {paths['export']}...")
+    instrumentation.count("messages_exported", len(order))
+    with atomic_write(paths['export']) as f:
+        f.write(f"# {title}: {list_name}\n")
+        f.write(f"Generated: {generated}\n\n")
+        f.write(summary)
+        for i, (mid, _) in enumerate(order, 1):
+            f.write(fragments[mid].replace(INDEX_TOKEN, str(i)))
+    cache.set_meta("export_hash", body_hash)
+    return True
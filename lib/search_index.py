@@ -0,0 +1,126 @@
+import re
+import sqlite3
+
+from lib.storage import digest
+
+# --- FULL-TEXT SEARCH INDEX ---
+# One SQLite FTS5 index shared by all platforms (data/search_index.sqlite), kept in sync by save_all.
+# Only messages whose indexed fields changed are rewritten, so an incremental sync costs next to nothing.
+
+# Column weights for bm25(): a hit in the subject matters more than one in the body
+INDEXED_FIELDS = ("subject", "preview", "content", "link_title", "link_text")
+FIELD_WEIGHTS = (5.0, 2.0, 1.0, 2.0, 1.0)
+# Exporters running at the same time (export_all.py) take turns writing the shared index
+BUSY_TIMEOUT = 60.0
+
+def indexed_fields(data):
+    """Searchable text of a raw message dict (message.to_dict())."""
+    link = data.get('link_attachment') or {}
+    return (data.get('subject') or "", data.get('preview') or "", data.get('content') or "",
+            link.get('title') or "", link.get('text') or "")
+
+def _fallback_query(query):
+    """Quotes every word, for input that is not valid FTS5 syntax (e.g. `c++` or unbalanced quotes)."""
+    words = re.findall(r"\w+", query)
+    return " ".join(f'"{w}"' for w in words)
+
+class SearchIndex:
+    def __init__(self, path):
+        self.path = path
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""CREATE TABLE IF NOT EXISTS docs (
+            rowid INTEGER PRIMARY KEY, platform TEXT, id TEXT, date TEXT, status TEXT,
+            source TEXT, subchannel TEXT, hash TEXT, UNIQUE (platform, id))""")
+        conn.execute("CREATE INDEX IF NOT EXISTS docs_date ON docs (date)")
+        conn.execute(f"""CREATE VIRTUAL TABLE IF NOT EXISTS fts USING fts5(
+            {", ".join(INDEXED_FIELDS)}, tokenize = 'unicode61 remove_diacritics 2')""")
+        return conn
+
+    def update(self, platform, messages, all_ids=None):
+        """
+        Syncs the index of `platform` with raw message dicts {id: data}: changed messages are
+        re-indexed, missing ones removed. With `all_ids`, `messages` may be just the changed subset
+        and only documents not in `all_ids` are removed. Returns the number of documents written.
+        """
+        if all_ids is None: all_ids = messages
+        conn = self._connect()
+        try:
+            with conn:
+                stored = {mid: (rowid, h) for rowid, mid, h in
+                          conn.execute("SELECT rowid, id, hash FROM docs WHERE platform = ?", (platform,))}
+                written = 0
+                for mid, data in messages.items():
+                    fields = indexed_fields(data)
+                    meta = (data.get('date'), data.get('status'), data.get('source'), data.get('subchannel'))
+                    doc_hash = digest("\x00".join(fields + tuple(str(v) for v in meta)))
+                    old = stored.get(mid)
+                    if old and old[1] == doc_hash: continue
+                    if old:
+                        conn.execute("DELETE FROM fts WHERE rowid = ?", (old[0],))
+                        conn.execute("DELETE FROM docs WHERE rowid = ?", (old[0],))
+                    cur = conn.execute("""INSERT INTO docs (platform, id, date, status, source, subchannel, hash)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)""", (platform, mid) + meta + (doc_hash,))
+                    conn.execute(f"INSERT INTO fts (rowid, {', '.join(INDEXED_FIELDS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                                 (cur.lastrowid,) + fields)
+                    written += 1
+
+                removed = [(rowid,) for mid, (rowid, _) in stored.items() if mid not in all_ids]
+                conn.executemany("DELETE FROM fts WHERE rowid = ?", removed)
+                conn.executemany("DELETE FROM docs WHERE rowid = ?", removed)
+        finally:
+            conn.close()
+        return written + len(removed)
+
+    def ids(self, platform):
+        """Ids of the indexed documents of `platform`."""
+        conn = self._connect()
+        try:
+            return {mid for (mid,) in conn.execute("SELECT id FROM docs WHERE platform = ?", (platform,))}
+        finally:
+            conn.close()
+
+    def search(self, query, limit=20, platform=None, source=None, status=None, date_from=None, date_to=None):
+        """
+        Ranked (bm25) FTS5 query with optional filters. Dates compare as ISO strings (YYYY-MM-DD prefixes work).
+        Returns a list of dicts with platform, id, date, status, source, subject, snippet and score.
+        """
+        filters, params = [], []
+        for column, value in (("platform", platform), ("source", source), ("status", status)):
+            if value:
+                filters.append(f"d.{column} = ?")
+                params.append(value)
+        if date_from:
+            filters.append("d.date >= ?")
+            params.append(date_from)
+        if date_to:
+            # Inclusive: 2024-05-01 also matches 2024-05-01T10:00:00Z
+            filters.append("d.date < ?")
+            params.append(date_to + "\uffff")
+
+        sql = f"""SELECT d.platform, d.id, d.date, d.status, d.source, fts.subject,
+                snippet(fts, -1, '[', ']', ' … ', 16), bm25(fts, {", ".join(map(str, FIELD_WEIGHTS))}) AS score
+            FROM fts JOIN docs d ON d.rowid = fts.rowid
+            WHERE fts MATCH ? {"".join(" AND " + f for f in filters)}
+            ORDER BY score LIMIT ?"""
+
+        conn = self._connect()
+        try:
+            try:
+                rows = conn.execute(sql, [query] + params + [limit]).fetchall()
+            except sqlite3.OperationalError:
+                fallback = _fallback_query(query)
+                rows = conn.execute(sql, [fallback] + params + [limit]).fetchall() if fallback else []
+        finally:
+            conn.close()
+        keys = ("platform", "id", "date", "status", "source", "subject", "snippet", "score")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def count(self):
+        conn = self._connect()
+        try:
+            return dict(conn.execute("SELECT platform, COUNT(*) FROM docs GROUP BY platform"))
+        finally:
+            conn.close()
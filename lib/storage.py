@@ -0,0 +1,244 @@
+import os
+import json
+import sqlite3
+import shutil
+import zlib
+import hashlib
+import threading
+
+from lib import instrumentation
+from lib.atomic_io import write_json
+
+# --- STORAGE BACKENDS ---
+# Both backends speak raw dicts (message.to_dict()); base_utils turns them into objects.
+# save_records()/load_index() work on records instead (see BaseMessage.to_record()): the message fields
+# and the content are kept apart, so the SQLite backend can load a compact index up front and read the
+# bodies on demand (load_db(..., lazy=True)).
+
+DEFAULT_LAST_SYNC = "1970-01-01T00:00:00Z"
+DEFAULT_LIST_NAME = "Unknown"
+
+def open_store(db_path):
+    """Picks a backend by file extension (.json -> legacy whole-file JSON, anything else -> SQLite)."""
+    if db_path.endswith(".json"):
+        return JsonStore(db_path)
+    return SqliteStore(db_path)
+
+def serialize_message(data):
+    """JSON text of a message dict as stored: keys keep their order (to_markdown() lists metrics that way)."""
+    return json.dumps(data, ensure_ascii=False)
+
+def canonical_message(data):
+    """JSON text with sorted keys, for change hashes that don't depend on key order."""
+    return json.dumps(data, ensure_ascii=False, sort_keys=True)
+
+def digest(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def content_digest(content):
+    return digest(canonical_message(content))
+
+def record_hash(fields, content, content_hash=None):
+    """
+    Hash of a record (fields, content, content_hash) including the key order of the fields, which the
+    rendered output follows; a known content hash saves reading the body.
+    """
+    if content_hash is None: content_hash = content_digest(content)
+    return digest(f"{serialize_message(fields)}\x00{content_hash}")
+
+def split_message(data):
+    """Raw message dict -> record (fields, content, None)."""
+    fields = dict(data)
+    return fields, fields.pop('content', None), None
+
+# Bodies of at least this many bytes are stored zlib-compressed (if that makes them smaller)
+COMPRESS_MIN_BYTES = 256
+
+def encode_body(content):
+    """Body column value: b'z' + zlib stream or b'u' + UTF-8 text (None for no content)."""
+    if content is None: return None
+    raw = content.encode('utf-8')
+    if len(raw) >= COMPRESS_MIN_BYTES:
+        packed = zlib.compress(raw, 6)
+        if len(packed) < len(raw): return b"z" + packed
+    return b"u" + raw
+
+def decode_body(blob):
+    if blob is None: return None
+    blob = bytes(blob)
+    if blob[:1] == b"z": return zlib.decompress(blob[1:]).decode('utf-8')
+    return blob[1:].decode('utf-8')
+
+class JsonStore:
+    """The original format: one JSON document rewritten on every save."""
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return DEFAULT_LAST_SYNC, DEFAULT_LIST_NAME, {}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return (data.get("last_sync", DEFAULT_LAST_SYNC), data.get("list_name", DEFAULT_LIST_NAME),
+                data.get("messages", {}))
+
+    def load_index(self):
+        """Same shape as SqliteStore.load_index(), but the whole file is read anyway: every entry is complete."""
+        last_sync, list_name, messages = self.load()
+        return last_sync, list_name, {mid: (data, None) for mid, data in messages.items()}, None
+
+    def save(self, last_sync, list_name, messages):
+        db_data = {"last_sync": last_sync, "list_name": list_name, "messages": messages}
+        write_json(self.path, db_data, indent=2)
+        return len(messages)
+
+    def save_records(self, last_sync, list_name, records):
+        """Rewrites the file from records (all complete, as load_index() never defers content). All ids count as changed."""
+        messages = {mid: dict(fields, content=content) for mid, (fields, content, _) in records.items()}
+        self.save(last_sync, list_name, messages)
+        return list(messages), []
+
+    def backup(self, dest):
+        if not os.path.exists(self.path): return False
+        shutil.copy2(self.path, f"{dest}.part")
+        os.replace(f"{dest}.part", dest)
+        return True
+
+class SqliteStore:
+    """
+    One row per message, upserted by id. Only rows whose serialized content changed are written.
+    `data` holds the fields without the content, which lives in `body` (compressed when large) with its
+    hash in `content_hash`; since `body` is the last column, reading the index never touches it.
+    Rows written before the body column existed keep the content in `data` until they are rewritten.
+    On first use, an existing {platform}_db.json next to it is imported once and renamed to *.migrated.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.legacy_json = os.path.splitext(path)[0] + ".json"
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute("""CREATE TABLE IF NOT EXISTS messages (
+            id TEXT PRIMARY KEY, date TEXT, status TEXT, source TEXT, hash TEXT, data TEXT,
+            content_hash TEXT, body BLOB)""")
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(messages)")}
+        if "body" not in columns:
+            conn.execute("ALTER TABLE messages ADD COLUMN content_hash TEXT")
+            conn.execute("ALTER TABLE messages ADD COLUMN body BLOB")
+        return conn
+
+    def _migrate_legacy(self):
+        if os.path.exists(self.path) or not os.path.exists(self.legacy_json): return
+        print(f"📦 Migrating {os.path.basename(self.legacy_json)} -> {os.path.basename(self.path)}...")
+        last_sync, list_name, messages = JsonStore(self.legacy_json).load()
+        self.save(last_sync, list_name, messages)
+        os.rename(self.legacy_json, f"{self.legacy_json}.migrated")
+
+    def load(self):
+        self._migrate_legacy()
+        if not os.path.exists(self.path):
+            return DEFAULT_LAST_SYNC, DEFAULT_LIST_NAME, {}
+        with self._connect() as conn:
+            meta = dict(conn.execute("SELECT key, value FROM meta"))
+            messages = {}
+            for mid, data, body in conn.execute("SELECT id, data, body FROM messages"):
+                data = json.loads(data)
+                if 'content' not in data: data['content'] = decode_body(body)
+                messages[mid] = data
+        conn.close()
+        return meta.get("last_sync", DEFAULT_LAST_SYNC), meta.get("list_name", DEFAULT_LIST_NAME), messages
+
+    def load_index(self):
+        """
+        Like load() without reading the bodies: returns (last_sync, list_name, {id: (data, content_hash)}, load_body),
+        where data lacks 'content' and load_body(id) fetches it. Rows that still hold their content in `data`
+        come back complete, with content_hash None.
+        """
+        self._migrate_legacy()
+        if not os.path.exists(self.path):
+            return DEFAULT_LAST_SYNC, DEFAULT_LIST_NAME, {}, None
+        with self._connect() as conn:
+            meta = dict(conn.execute("SELECT key, value FROM meta"))
+            index = {mid: (json.loads(data), content_hash)
+                     for mid, data, content_hash in conn.execute("SELECT id, data, content_hash FROM messages")}
+        conn.close()
+        return (meta.get("last_sync", DEFAULT_LAST_SYNC), meta.get("list_name", DEFAULT_LIST_NAME),
+                index, BodyReader(self.path))
+
+    def save(self, last_sync, list_name, messages):
+        """Upserts changed raw message dicts, deletes the ones no longer present. Returns number of rows written."""
+        changed, removed = self.save_records(last_sync, list_name,
+                                             {mid: split_message(data) for mid, data in messages.items()})
+        return len(changed) + len(removed)
+
+    def save_records(self, last_sync, list_name, records):
+        """
+        Upserts changed records {id: (fields, content, content_hash)}, deletes the ones no longer present.
+        A record without its content (content_hash given) only updates the fields; the stored body is kept.
+        Returns (ids written, ids removed).
+        """
+        conn = self._connect()
+        try:
+            with conn:
+                stored = dict(conn.execute("SELECT id, hash FROM messages"))
+                rows, field_rows = [], []
+                for mid, (fields, content, content_hash) in records.items():
+                    text = serialize_message(fields)
+                    lazy = content_hash is not None
+                    if not lazy: content_hash = content_digest(content)
+                    row_digest = digest(f"{canonical_message(fields)}\x00{content_hash}")
+                    if stored.get(mid) == row_digest: continue
+                    meta = (fields.get('date'), fields.get('status'), fields.get('source'), row_digest, text)
+                    if lazy: field_rows.append(meta + (mid,))
+                    else: rows.append((mid,) + meta + (content_hash, encode_body(content)))
+
+                conn.executemany("""INSERT INTO messages (id, date, status, source, hash, data, content_hash, body)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(id) DO UPDATE SET date=excluded.date, status=excluded.status,
+                        source=excluded.source, hash=excluded.hash, data=excluded.data,
+                        content_hash=excluded.content_hash, body=excluded.body""", rows)
+                conn.executemany("UPDATE messages SET date=?, status=?, source=?, hash=?, data=? WHERE id = ?", field_rows)
+                removed = [mid for mid in stored if mid not in records]
+                conn.executemany("DELETE FROM messages WHERE id = ?", [(mid,) for mid in removed])
+                conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                 [("last_sync", last_sync), ("list_name", list_name)])
+        finally:
+            conn.close()
+        return [r[0] for r in rows] + [r[-1] for r in field_rows], removed
+
+    def backup(self, dest):
+        """Consistent copy of the database (including WAL contents) at `dest`. False if there is no DB yet."""
+        if not os.path.exists(self.path): return False
+        tmp_path = f"{dest}.part"
+        if os.path.exists(tmp_path): os.remove(tmp_path)
+        src, dst = sqlite3.connect(self.path), sqlite3.connect(tmp_path)
+        try:
+            src.backup(dst)
+        finally:
+            src.close()
+            dst.close()
+        os.replace(tmp_path, dest)
+        return True
+
+class BodyReader:
+    """
+    load_body(id) for lazily loaded messages: one long-lived connection that reads single bodies by
+    primary key from the memory-mapped database file, so only the pages of bodies actually used are paged in.
+    """
+    MMAP_SIZE = 1 << 30
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def __call__(self, mid):
+        with self._lock:
+            if self._conn is None:
+                self._conn = sqlite3.connect(self.path, check_same_thread=False)
+                self._conn.execute(f"PRAGMA mmap_size={self.MMAP_SIZE}")
+            row = self._conn.execute("SELECT body FROM messages WHERE id = ?", (mid,)).fetchone()
+        instrumentation.count("bodies_loaded")
+        return decode_body(row[0]) if row else None
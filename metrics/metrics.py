@@ -0,0 +1,83 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+# Add ../lib to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from lib.metrics_store import PERIODS, RATE_WEIGHT, open_metrics_store, is_rate
+
+# --- CONFIG ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DATA_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, '..', 'data'))
+
+def format_value(metric, value):
+    if value is None: return "-"
+    return f"{value:.2f}%" if is_rate(metric) else f"{value:,.2f}".rstrip("0").rstrip(".")
+
+def print_totals(store, totals):
+    print(f"📊 {len(store.ids)} post(s), {len(store)} snapshot row(s), metrics: {', '.join(store.types) or 'none'}")
+    for metric, t in totals.items():
+        kind = "weighted by impressions" if is_rate(metric) else "total"
+        print(f"   {metric:<20} {format_value(metric, t['total']):>14} ({kind}), {t['posts']} post(s), "
+              f"mean {format_value(metric, t['mean'])}")
+
+def print_periods(metric, rows):
+    label = "rate" if is_rate(metric) else "total"
+    print(f"{'period':<10} {'posts':>6} {label:>14} {'mean/post':>12}")
+    for row in rows:
+        print(f"{row['period']:<10} {row['posts']:>6} {format_value(metric, row['total']):>14} "
+              f"{format_value(metric, row['mean']):>12}")
+
+def print_top(metric, rows):
+    for n, row in enumerate(rows, 1):
+        print(f"{n:>3}. [{row['posted'][:10]}] #{row['id']}  {format_value(metric, row['value'])}")
+
+def print_history(rows):
+    for row in rows:
+        print(f"[{row['taken']}] {row['metric']:<20} {format_value(row['metric'], row['value'])}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Engagement metrics aggregations over the columnar metrics store")
+    parser.add_argument('command', nargs='?', default="summary", choices=("summary", "periods", "top", "history"))
+    parser.add_argument('message_id', nargs='?', help="Post id (for `history`)")
+    parser.add_argument('--platform', default="linkedin")
+    parser.add_argument('--metric', default=RATE_WEIGHT, help="impressions, engagementRate, ...")
+    parser.add_argument('--period', default="month", choices=PERIODS)
+    parser.add_argument('-k', '--limit', type=int, default=50, help="Number of posts for `top`")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    parser.add_argument('--data-dir', default=BASE_DATA_DIR)
+    args = parser.parse_args()
+
+    path = os.path.join(args.data_dir, args.platform, f"{args.platform}_metrics.npz")
+    if not os.path.exists(path):
+        print(f"⚠️ No metrics recorded yet ({path}). Run the exporter first.")
+        return
+    store = open_metrics_store(path)
+    if store is None: return
+
+    start = time.perf_counter()
+    if args.command == "summary":
+        result = store.totals()
+    elif args.command == "periods":
+        result = store.by_period(args.metric, args.period)
+    elif args.command == "top":
+        result = store.top(args.metric, args.limit)
+    else:
+        if not args.message_id: parser.error("history needs a message id")
+        result = store.history(args.message_id)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+    if args.command == "summary": print_totals(store, result)
+    elif args.command == "periods": print_periods(args.metric, result)
+    elif args.command == "top": print_top(args.metric, result)
+    else: print_history(result)
+    print(f"⚡ {elapsed_ms:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+
+# Add ../lib to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from lib.search_index import SearchIndex
+from lib.storage import open_store
+
+# --- CONFIG ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DATA_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, '..', 'data'))
+
+def reindex(index, data_dir):
+    """Rebuilds the index from every {platform}/{platform}_db.sqlite under data_dir."""
+    for db_path in sorted(glob.glob(os.path.join(data_dir, "*", "*_db.sqlite"))):
+        platform = os.path.basename(os.path.dirname(db_path))
+        _, _, messages = open_store(db_path).load()
+        written = index.update(platform, messages)
+        print(f"🔎 {platform}: {len(messages)} message(s), {written} (re)indexed.")
+
+def print_results(results, elapsed_ms):
+    for n, r in enumerate(results, 1):
+        title = r['subject'] or " ".join(r['snippet'].split())[:60]
+        print(f"{n:>3}. [{r['date'][:10]}] {r['platform']}/{r['status']} #{r['id']}  {title}")
+        print(f"     {' '.join(r['snippet'].split())}")
+    print(f"⚡ {len(results)} result(s) in {elapsed_ms:.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-text search over all archived messages")
+    parser.add_argument('query', nargs='?', help='FTS5 query, e.g. book launch, "exact phrase", subject:newsletter, writ*')
+    parser.add_argument('--platform', help="aweber, linkedin, ...")
+    parser.add_argument('--source', help="Message source, e.g. aweber or buffer")
+    parser.add_argument('--status', help="sent, scheduled, draft")
+    parser.add_argument('--from', dest='date_from', help="YYYY-MM-DD")
+    parser.add_argument('--to', dest='date_to', help="YYYY-MM-DD (inclusive)")
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    parser.add_argument('--data-dir', default=BASE_DATA_DIR, help="Directory holding search_index.sqlite")
+    parser.add_argument('--reindex', action='store_true', help="Rebuild the index from the platform databases")
+    args = parser.parse_args()
+
+    index = SearchIndex(os.path.join(args.data_dir, "search_index.sqlite"))
+    if args.reindex:
+        reindex(index, args.data_dir)
+    if not args.query:
+        if not args.reindex:
+            counts = index.count()
+            print(f"📚 Indexed: {', '.join(f'{p}: {n}' for p, n in counts.items()) or 'nothing yet (run an exporter or --reindex)'}")
+        return
+
+    start = time.perf_counter()
+    results = index.search(args.query, limit=args.limit, platform=args.platform, source=args.source,
+                           status=args.status, date_from=args.date_from, date_to=args.date_to)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        print_results(results, elapsed_ms)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import os
+import sys
+import json
+import glob
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (ROOT_DIR, os.path.join(ROOT_DIR, 'buffer')):
+    if path not in sys.path: sys.path.insert(0, path)
+
+import buffer_dumper
+from lib.base_utils import get_platform_paths
+
+def _write_dump(path, count):
+    edges = [{"node": {"id": f"post{i:04d}", "text": f"Post number {i} " + "word " * 200,
+                       "status": "sent", "sentAt": f"2024-01-{i % 28 + 1:02d}T10:00:00Z",
+                       "metrics": [{"type": "impressions", "value": i}]}} for i in range(count)]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"data": {"posts": {"edges": edges}}}, f)
+
+def test_unchanged_dumps_still_apply_export_options(tmp_path, monkeypatch):
+    dumps = tmp_path / "dumps"
+    dumps.mkdir()
+    paths = get_platform_paths("linkedin", str(tmp_path / "data"))
+    monkeypatch.setattr(buffer_dumper, "PATHS", paths)
+    monkeypatch.setattr(buffer_dumper, "SENT_PATTERN", str(dumps / "linkedIn-response.sent*.json"))
+    monkeypatch.setattr(buffer_dumper, "QUEUE_PATTERN", str(dumps / "linkedIn-response.queue*.json"))
+    _write_dump(dumps / "linkedIn-response.sent.1.json", 20)
+
+    assert buffer_dumper.main(["--parse-workers", "1"])["dumps_parsed"] == 1
+    assert not os.path.exists(paths['export_manifest'])
+
+    # Nothing changed since the first run, but the export is rebuilt with the new options
+    result = buffer_dumper.main(["--parse-workers", "1", "--shard-tokens", "2000"])
+    assert result == {"messages": 20, "dumps_parsed": 0}
+    with open(paths['export_manifest'], encoding='utf-8') as f:
+        manifest = json.load(f)
+    shards = glob.glob(paths['export'].replace(".md", ".part*.md"))
+    assert len(shards) > 1
+    assert len(manifest['shards']) == len(shards)
+    assert len(manifest['messages']) == 20